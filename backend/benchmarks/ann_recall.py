@@ -0,0 +1,110 @@
+"""
+Measures recall@k and p50/p99 latency of the ANN indexes on chunked_data.embedding
+against exact (sequential scan) search, for a range of ef_search / probes settings.
+
+Query vectors are sampled from the stored chunk embeddings, so no model is needed.
+If several indexes share an operator class the planner picks one of them, so keep
+only the index being measured.
+Build the index first (POST /api/v1/db/vector-indexes/), then run from the backend folder:
+    python -m benchmarks.ann_recall --metric cosine --ef-search 10 40 100 200
+    python -m benchmarks.ann_recall --metric l2 --probes 1 5 10 20
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sqlalchemy import text
+
+from src.db.database import SessionLocal
+from src.utils.vector_index import set_vector_search_params
+
+OPERATORS = {"cosine": "<=>", "l2": "<->"}
+
+
+def sample_query_vectors(db, n_queries):
+    rows = db.execute(
+        text("SELECT embedding::text FROM chunked_data ORDER BY random() LIMIT :n"),
+        {"n": n_queries},
+    ).scalars()
+    return list(rows)
+
+
+def top_k(db, vector, metric, k, exact=False, ef_search=None, probes=None):
+    """
+    Runs one top-k query in its own transaction and returns (chunk_ids, seconds).
+    """
+    try:
+        if exact:
+            # Disabling index scans forces the planner onto the exact sequential scan
+            db.execute(text("SELECT set_config('enable_indexscan', 'off', true)"))
+        set_vector_search_params(db, ef_search=ef_search, probes=probes)
+        start = time.perf_counter()
+        ids = db.execute(
+            text(
+                f"SELECT chunk_id FROM chunked_data "
+                f"ORDER BY embedding {OPERATORS[metric]} CAST(:vector AS vector) LIMIT :k"
+            ),
+            {"vector": vector, "k": k},
+        ).scalars().all()
+        return ids, time.perf_counter() - start
+    finally:
+        db.rollback()
+
+
+def run_setting(db, vectors, exact_results, metric, k, label, **params):
+    recalls, latencies = [], []
+    for vector, exact_ids in zip(vectors, exact_results):
+        ids, seconds = top_k(db, vector, metric, k, **params)
+        recalls.append(len(set(ids) & set(exact_ids)) / k)
+        latencies.append(seconds * 1000)
+    print(
+        f"{label:>22} {np.mean(recalls):>9.3f} "
+        f"{np.percentile(latencies, 50):>9.2f} {np.percentile(latencies, 99):>9.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--metric", choices=list(OPERATORS), default="cosine")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--ef-search", type=int, nargs="*", default=[10, 20, 40, 80, 160])
+    parser.add_argument("--probes", type=int, nargs="*", default=[])
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        vectors = sample_query_vectors(db, args.queries)
+        if not vectors:
+            print("chunked_data is empty, ingest some articles first")
+            return
+
+        exact_results, exact_latencies = [], []
+        for vector in vectors:
+            ids, seconds = top_k(db, vector, args.metric, args.k, exact=True)
+            exact_results.append(ids)
+            exact_latencies.append(seconds * 1000)
+
+        print(f"{len(vectors)} queries, metric={args.metric}, k={args.k}")
+        print(f"{'setting':>22} {'recall@k':>9} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+        print(
+            f"{'exact':>22} {1.0:>9.3f} {np.percentile(exact_latencies, 50):>9.2f} "
+            f"{np.percentile(exact_latencies, 99):>9.2f}"
+        )
+        for ef_search in args.ef_search:
+            run_setting(
+                db, vectors, exact_results, args.metric, args.k,
+                f"hnsw ef_search={ef_search}", ef_search=ef_search,
+            )
+        for probes in args.probes:
+            run_setting(
+                db, vectors, exact_results, args.metric, args.k,
+                f"ivfflat probes={probes}", probes=probes,
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Compares the per-article ORM ingest path (store_articles) against the
+bulk INSERT/COPY path (store_articles_bulk) using synthetic articles.
+
+Run from the backend folder (inside the api container so the db host resolves):
+    python -m benchmarks.bulk_ingest --sizes 1000 10000
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import random
+import time
+import uuid
+
+from sqlalchemy import text
+
+from src.db import models
+from src.db.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from src.utils.database import store_articles, store_articles_bulk
+
+
+def make_articles(n_articles, chunks_per_article, run_id):
+    articles = []
+    for i in range(n_articles):
+        chunks = [f"chunk {j} of article {i} " * 40 for j in range(chunks_per_article)]
+        articles.append(
+            {
+                "url": f"https://bench.local/{run_id}/{i}",
+                "urlToImage": None,
+                "source": "bench",
+                "author": "bench",
+                "title": f"Benchmark article {i}",
+                "description": "synthetic",
+                "publishedAt": "2025-01-01T00:00:00Z",
+                "scrape_successful": True,
+                "text": " ".join(chunks),
+                "chunks": chunks,
+                "embeddings_list": [
+                    [random.random() for _ in range(384)] for _ in chunks
+                ],
+            }
+        )
+    return articles
+
+
+def cleanup(run_id):
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "DELETE FROM chunked_data WHERE article_id IN "
+                "(SELECT article_id FROM articles WHERE url LIKE :prefix)"
+            ),
+            {"prefix": f"https://bench.local/{run_id}/%"},
+        )
+        conn.execute(
+            text("DELETE FROM articles WHERE url LIKE :prefix"),
+            {"prefix": f"https://bench.local/{run_id}/%"},
+        )
+
+
+def time_store_orm(articles, run_id):
+    db = SessionLocal()
+    try:
+        # Silence the per-article progress prints while timing
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            store_articles(articles, db)
+            return time.perf_counter() - start
+    finally:
+        db.close()
+        cleanup(run_id)
+
+
+def time_store_bulk(articles, run_id):
+    async def store():
+        async with AsyncSessionLocal() as db:
+            start = time.perf_counter()
+            await store_articles_bulk(articles, db)
+            seconds = time.perf_counter() - start
+        # Pooled connections belong to this event loop, which asyncio.run closes
+        await async_engine.dispose()
+        return seconds
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return asyncio.run(store())
+    finally:
+        cleanup(run_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--chunks-per-article", type=int, default=4)
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+
+    print(f"{'articles':>10} {'orm (s)':>10} {'bulk (s)':>10} {'speedup':>8}")
+    for size in args.sizes:
+        run_id = uuid.uuid4().hex
+        articles = make_articles(size, args.chunks_per_article, run_id)
+        orm_seconds = time_store_orm(articles, run_id)
+        bulk_seconds = time_store_bulk(articles, run_id)
+        print(
+            f"{size:>10} {orm_seconds:>10.2f} {bulk_seconds:>10.2f} "
+            f"{orm_seconds / bulk_seconds:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Compares SentenceClaimDetector.get_embeddings (in-memory, length-sorted tensor batches)
+against the previous datasets.Dataset.map implementation: per-article latency and the
+largest difference between the two feature matrices.
+
+Run from the backend folder:
+    python -m benchmarks.claim_embeddings --batch-sizes 8 32 64
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import nltk
+import numpy as np
+import torch
+from datasets import Dataset
+from datasets.utils.logging import disable_progress_bar, set_verbosity_error
+
+from src.utils.bias_detection import SentenceClaimDetector
+
+BASE_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def dataset_map_embeddings(detector, sentences):
+    """
+    The previous get_embeddings: Arrow dataset, tokenized and encoded through Dataset.map.
+    """
+    raw_sentences = Dataset.from_list([{"text": s} for s in sentences])
+    tokenized_sentences = raw_sentences.map(
+        lambda x: detector.tokenizer(x["text"], padding=True, truncation=True), batched=True
+    )
+
+    @torch.inference_mode()
+    def get_output_embeddings(batch):
+        input_ids = torch.tensor(batch["input_ids"]).to(detector.device)
+        attention_mask = torch.tensor(batch["attention_mask"]).to(detector.device)
+        output = detector.model(input_ids, attention_mask=attention_mask).last_hidden_state[:, 0]
+        return {"features": output.cpu().numpy()}
+
+    features = tokenized_sentences.map(get_output_embeddings, batched=True, batch_size=10)
+    return np.array(features["features"])
+
+
+def time_per_article(fn, articles, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for sentences in articles:
+            fn(sentences)
+    return (time.perf_counter() - start) / (repeats * len(articles)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    disable_progress_bar()
+    set_verbosity_error()
+
+    with open(BASE_DIR / "test_suite_responses.json") as f:
+        text = json.load(f)["test_extraction"]["test_text"]
+    # One long and one short article
+    articles = [nltk.sent_tokenize(text), nltk.sent_tokenize(text)[:8]]
+
+    detector = SentenceClaimDetector(str(BASE_DIR / "models/claimdetection_oneClassSVM.pkl"))
+
+    reference = [dataset_map_embeddings(detector, sentences) for sentences in articles]
+    legacy_ms = time_per_article(lambda s: dataset_map_embeddings(detector, s), articles, args.repeats)
+    print(f"{'path':>20} {'ms/article':>11} {'max |diff|':>11}")
+    print(f"{'Dataset.map':>20} {legacy_ms:>11.1f} {0.0:>11.2e}")
+    for batch_size in args.batch_sizes:
+        max_diff = max(
+            np.abs(detector.get_embeddings(sentences, batch_size) - ref).max()
+            for sentences, ref in zip(articles, reference)
+        )
+        ms = time_per_article(
+            lambda s: detector.get_embeddings(s, batch_size), articles, args.repeats
+        )
+        print(f"{'tensors bs=' + str(batch_size):>20} {ms:>11.1f} {max_diff:>11.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Measures cold start of the API: time until the process answers /ping/ (the server
+is accepting requests) and until /ready returns 200 (every model is loaded), plus
+the per-model load times reported by /ready.
+
+Run from the backend folder, with the database reachable through the usual .env:
+    python -m benchmarks.cold_start --runs 3
+"""
+
+import argparse
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def wait_for(client, path, deadline):
+    while time.perf_counter() < deadline:
+        try:
+            response = client.get(path)
+            if response.status_code == 200:
+                return response
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"{path} did not return 200 in time")
+
+
+def cold_start(port, timeout):
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.app.main:app", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=5) as client:
+            wait_for(client, "/ping/", start + timeout)
+            serving = time.perf_counter() - start
+            models = wait_for(client, "/ready", start + timeout).json()["models"]
+            ready = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+    return serving, ready, models
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    print(f"{'run':>4} {'serving (s)':>12} {'ready (s)':>10}  model load times (s)")
+    for run in range(args.runs):
+        serving, ready, models = cold_start(args.port, args.timeout)
+        loads = ", ".join(f"{name}={m['load_seconds']:.1f}" for name, m in models.items())
+        print(f"{run:>4} {serving:>12.2f} {ready:>10.2f}  {loads}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Compares the ONNX Runtime embedding backends (fp32 and int8) against torch.
+
+Parity: the cosine similarity between each text's backend and torch embeddings,
+and the overlap of the top-k neighbours each backend retrieves for the same queries.
+Throughput: texts per second at batch sizes 1, 32 and 256.
+
+Needs a model folder exported by `python -m src.export_embedding_model`. Pass
+--texts with a file of one text per line (e.g. stored chunks), otherwise
+synthetic news sentences are used. Run from the backend folder:
+    python -m benchmarks.embedding_backends --model-dir /models/all-MiniLM-L6-v2
+
+It exits with status 1 if a backend falls below --min-cosine or --min-overlap.
+"""
+
+import argparse
+import random
+import sys
+import time
+
+import numpy as np
+
+from src.utils.local_models import ONNX_FILE_NAMES, load_embeddings_model
+
+SUBJECTS = ["The city council", "The central bank", "Lawmakers", "The company", "Researchers", "Voters", "The union"]
+VERBS = ["approved", "rejected", "delayed", "announced", "criticised", "proposed", "investigated"]
+OBJECTS = [
+    "a new budget for schools", "an increase in interest rates", "the merger with its rival",
+    "a vaccine trial", "stricter emissions rules", "a plan to expand the airport", "cuts to public transport",
+]
+DETAILS = ["on Tuesday", "after months of debate", "despite protests", "amid rising prices", "ahead of the election"]
+
+
+def synthetic_texts(n):
+    rng = random.Random(0)
+    return [
+        f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(DETAILS)}."
+        for _ in range(n)
+    ]
+
+
+def normalize(embeddings):
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def top_k(queries, corpus, k):
+    return np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+
+
+def texts_per_second(model, texts, batch_size):
+    model.encode(texts[:batch_size], batch_size=batch_size)  # Warm-up
+    start = time.perf_counter()
+    model.encode(texts, batch_size=batch_size)
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-dir", required=True)
+    parser.add_argument("--texts", help="File with one text per line (default: synthetic sentences)")
+    parser.add_argument("--corpus-size", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 256])
+    parser.add_argument("--min-cosine", type=float, default=0.97)
+    parser.add_argument("--min-overlap", type=float, default=0.8)
+    args = parser.parse_args()
+
+    if args.texts:
+        with open(args.texts) as f:
+            texts = [line.strip() for line in f if line.strip()][: args.corpus_size + args.queries]
+    else:
+        texts = synthetic_texts(args.corpus_size + args.queries)
+    queries, corpus = texts[: args.queries], texts[args.queries :]
+
+    models = {"torch": load_embeddings_model("torch", args.model_dir)}
+    models.update({backend: load_embeddings_model(backend, args.model_dir) for backend in ONNX_FILE_NAMES})
+
+    embeddings = {
+        backend: (normalize(model.encode(queries, batch_size=32)), normalize(model.encode(corpus, batch_size=32)))
+        for backend, model in models.items()
+    }
+    torch_queries, torch_corpus = embeddings["torch"]
+    torch_top_k = top_k(torch_queries, torch_corpus, args.k)
+
+    print(f"{len(texts)} texts, top-{args.k} over {len(corpus)} for {len(queries)} queries")
+    print(f"{'backend':<10} {'mean cos':>9} {'min cos':>8} {f'top-{args.k} overlap':>14}")
+    passed = True
+    for backend, (backend_queries, backend_corpus) in embeddings.items():
+        cosine = np.sum(np.vstack([backend_queries, backend_corpus]) * np.vstack([torch_queries, torch_corpus]), axis=1)
+        neighbours = top_k(backend_queries, backend_corpus, args.k)
+        overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(neighbours, torch_top_k)])
+        print(f"{backend:<10} {cosine.mean():>9.4f} {cosine.min():>8.4f} {overlap:>14.3f}")
+        passed &= cosine.min() >= args.min_cosine and overlap >= args.min_overlap
+
+    print()
+    print(f"{'backend':<10}" + "".join(f"{f'bs={batch_size} texts/s':>16}" for batch_size in args.batch_sizes))
+    for backend, model in models.items():
+        rates = [texts_per_second(model, corpus, batch_size) for batch_size in args.batch_sizes]
+        print(f"{backend:<10}" + "".join(f"{rate:>16.1f}" for rate in rates))
+
+    if not passed:
+        print(f"\nParity check failed (min cosine {args.min_cosine}, min top-{args.k} overlap {args.min_overlap})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
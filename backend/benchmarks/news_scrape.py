@@ -0,0 +1,89 @@
+"""
+CPU time per article for the post-download work of a bias analysis scrape. The
+previous path parsed with download(input_html=...), ran article.nlp()
+(keywords and summary, never read), filtered sentences with inline regexes, and
+had the claim detector split the joined text again. The lean NewsScrape path
+parses with set_html, then splits and filters once with precompiled patterns,
+and the claim detector reuses its sentence list.
+
+Uses the same fixture corpus as benchmarks.scrape_pipeline (a folder of saved
+*.html pages, or synthetic pages). Needs the nltk punkt tokenizers. Run from the
+backend folder:
+    python -m benchmarks.news_scrape --corpus saved_pages/
+"""
+
+import argparse
+import re
+import statistics
+import time
+
+from newspaper import Article
+
+from benchmarks.scrape_pipeline import load_corpus
+from src.utils.bias_detection import clean_sentences
+from src.utils.local_models import split_sentences
+from src.utils.scrape_pipeline import parse_html
+
+
+def legacy_scrape(url, html, run_nlp):
+    """
+    The previous NewsScrape post-download steps, unchanged, plus the claim detector's split.
+    """
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    if run_nlp:
+        article.nlp()
+    sentences = split_sentences(article.text)
+    def is_valid_sentence(s):
+        s = s.strip()
+        if len(s) < 30: return False  # Too short
+        if re.search(r'http[s]?://', s): return False  # Contains URL
+        if re.search(r'\bsubscribe\b|\bread more\b|\bclick here\b', s, re.IGNORECASE): return False # Other common items
+        return True
+    cleaned_article = "\n".join(s for s in sentences if is_valid_sentence(s))
+    return split_sentences(cleaned_article)
+
+
+def lean_scrape(url, html):
+    return clean_sentences(parse_html(url, html)["text"])
+
+
+def cpu_ms(fn, pages):
+    times = []
+    for i, html in enumerate(pages):
+        start = time.process_time()
+        fn(f"https://bench.local/article/{i}", html)
+        times.append((time.process_time() - start) * 1000)
+    return statistics.mean(times), statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", help="Folder of saved *.html pages (default: synthetic pages)")
+    parser.add_argument("--pages", type=int, default=100, help="Synthetic pages to generate")
+    args = parser.parse_args()
+
+    pages = [html.decode("utf-8", errors="replace") for html in load_corpus(args.corpus, args.pages)]
+    lean_scrape("https://bench.local/warmup", pages[0])  # Loads the tokenizer
+
+    try:
+        legacy_scrape("https://bench.local/warmup", pages[0], run_nlp=True)
+        run_nlp = True
+    except LookupError:
+        # newspaper's nlp() loads the older punkt pickle, which newer nltk data doesn't ship
+        print("article.nlp() needs nltk's tokenizers/punkt, timing the previous path without it")
+        run_nlp = False
+
+    print(f"{len(pages)} pages, CPU ms per article")
+    print(f"{'path':<10} {'mean':>8} {'median':>8}")
+    for name, fn in (
+        ("previous", lambda url, html: legacy_scrape(url, html, run_nlp)),
+        ("lean", lean_scrape),
+    ):
+        mean, median = cpu_ms(fn, pages)
+        print(f"{name:<10} {mean:>8.2f} {median:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
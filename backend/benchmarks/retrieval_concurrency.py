@@ -0,0 +1,65 @@
+"""
+Measures how retrieval throughput scales with the number of parallel requests
+against a running API (the async DB layer should keep scaling until the pool or
+Postgres saturates).
+
+Run from the backend folder while the api container is up:
+    python -m benchmarks.retrieval_concurrency --base-url http://localhost:8000
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+import numpy as np
+
+QUERIES = ["stock", "election", "inflation", "AAPL", "tariffs", "interest rates"]
+
+
+async def run_level(client, url, concurrency, total_requests):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one_request(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(url, params={"query": QUERIES[i % len(QUERIES)]})
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one_request(i) for i in range(total_requests)])
+    elapsed = time.perf_counter() - start
+    print(
+        f"{concurrency:>11} {total_requests / elapsed:>10.1f} "
+        f"{np.percentile(latencies, 50):>9.1f} {np.percentile(latencies, 99):>9.1f} {errors:>7}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base-url", default="http://localhost:80")
+    parser.add_argument(
+        "--route", default="/api/v1/rag/retrieve-relevant-chunks-cosine/"
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--requests-per-level", type=int, default=200)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        # Warm up the model and the query embedding cache, so only retrieval is measured
+        for query in QUERIES:
+            await client.get(args.route, params={"query": query})
+
+        print(f"{'concurrency':>11} {'req/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}")
+        for concurrency in args.concurrency:
+            await run_level(client, args.route, concurrency, args.requests_per_level)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
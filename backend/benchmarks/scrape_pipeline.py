@@ -0,0 +1,139 @@
+"""
+Scrape throughput (download + parse, no scrape cache) on a corpus of HTML pages
+served from a local HTTP server. It compares the previous path, where requests
+downloads and newspaper parses on each worker thread, against the scrape
+pipeline, which awaits the downloads on one event loop with the pooled httpx
+client and parses in a process pool. --threads is the number of scrapes in
+flight on both paths.
+
+Pass a folder of saved article pages (*.html) with --corpus, otherwise synthetic
+article pages are generated. Run from the backend folder:
+    python -m benchmarks.scrape_pipeline --corpus saved_pages/ --threads 16 --processes 4
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+from newspaper import Article, Config
+from newspaper.network import get_html_2XX_only
+
+from src.utils.scrape_pipeline import ScrapePipeline, response_html
+
+
+def synthetic_page(rng, vocabulary, i):
+    paragraphs = "\n".join(
+        "<p>" + " ".join(rng.choices(vocabulary, k=rng.randint(40, 120))).capitalize() + ".</p>"
+        for _ in range(rng.randint(10, 40))
+    )
+    links = "".join(f'<li><a href="/related/{j}">Related story {j}</a></li>' for j in range(60))
+    return f"""<html><head><meta charset="utf-8"><title>Benchmark article {i}</title>
+<meta name="author" content="Bench Writer"><meta property="article:published_time" content="2025-01-01T00:00:00Z">
+</head><body><nav><ul>{links}</ul></nav><article><h1>Benchmark article {i}</h1>{paragraphs}</article>
+<footer><ul>{links}</ul></footer></body></html>"""
+
+
+def load_corpus(corpus, num_pages):
+    if corpus:
+        return [path.read_bytes() for path in sorted(Path(corpus).glob("*.html"))]
+    rng = random.Random(0)
+    vocabulary = ["".join(rng.choices("abcdefghijklmnop", k=rng.randint(3, 9))) for _ in range(2000)]
+    # newspaper scores text blocks by their stopwords, so the text needs some
+    vocabulary += ["the", "of", "and", "to", "in", "that", "is", "was", "for", "with"] * 100
+    return [synthetic_page(rng, vocabulary, i).encode() for i in range(num_pages)]
+
+
+def serve(pages):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, so pooled clients reuse connections
+
+        def do_GET(self):
+            body = pages[int(self.path.rsplit("/", 1)[-1]) % len(pages)]
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def legacy_scrape(url):
+    """
+    The previous path: requests download and newspaper parse on the calling thread.
+    """
+    config = Config()
+    response = requests.get(url, headers={"User-Agent": config.browser_user_agent}, timeout=config.request_timeout)
+    article = Article(url)
+    article.download(input_html=get_html_2XX_only(url, response=response))
+    article.parse()
+    return article.text
+
+
+async def pipeline_scrape(pipeline, url):
+    config = Config()
+    response = await pipeline.fetch(url, {"User-Agent": config.browser_user_agent}, config.request_timeout)
+    return (await pipeline.parse(url, response_html(response)))["text"]
+
+
+def pages_per_second(scrape, urls, threads):
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        texts = list(pool.map(scrape, urls))
+        elapsed = time.perf_counter() - start
+    assert all(texts), "Some pages had no text"
+    return len(urls) / elapsed
+
+
+async def pipeline_pages_per_second(pipeline, urls, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def scrape(url):
+        async with slots:
+            return await pipeline_scrape(pipeline, url)
+
+    await pipeline_scrape(pipeline, urls[0])  # Starts the client and the parse processes
+    start = time.perf_counter()
+    texts = await asyncio.gather(*(scrape(url) for url in urls))
+    elapsed = time.perf_counter() - start
+    await pipeline.aclose()
+    assert all(texts), "Some pages had no text"
+    return len(urls) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", help="Folder of saved *.html pages (default: synthetic pages)")
+    parser.add_argument("--pages", type=int, default=200, help="Synthetic pages to generate")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus, args.pages)
+    server = serve(pages)
+    urls = [f"http://127.0.0.1:{server.server_address[1]}/article/{i}" for i in range(len(pages))]
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / len(pages) / 1024:.0f} KiB on average, {args.threads} scrapes in flight")
+
+    print(f"{'path':<24} {'pages/s':>8}")
+    print(f"{'requests + thread parse':<24} {pages_per_second(legacy_scrape, urls, args.threads):>8.1f}")
+    for processes in args.processes:
+        pipeline = ScrapePipeline(parse_processes=processes, max_connections=args.threads)
+        rate = asyncio.run(pipeline_pages_per_second(pipeline, urls, args.threads))
+        print(f"{f'pipeline, {processes} processes':<24} {rate:>8.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares extractive summarization with the persistent, trimmed spaCy pipeline
+(tokenizer + senter) against the previous behaviour of loading the full
+en_core_web_sm pipeline inside every call: per-article latency, then batch
+throughput of summarize_nlp_batch for several n_process values.
+
+Run from the backend folder:
+    python -m benchmarks.summarize_nlp --articles 200 --n-process 1 2 4
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import spacy
+
+from src.utils.summarization import (
+    SPACY_MODEL,
+    summarize_doc,
+    summarize_nlp,
+    summarize_nlp_batch,
+)
+
+BASE_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def legacy_summarize_nlp(text, num_sentences):
+    """
+    The previous summarize_nlp: full pipeline loaded from disk on every call.
+    """
+    nlp = spacy.load(SPACY_MODEL)
+    return summarize_doc(nlp(text), num_sentences)
+
+
+def ms_per_article(fn, texts, num_sentences):
+    start = time.perf_counter()
+    for text in texts:
+        fn(text, num_sentences)
+    return (time.perf_counter() - start) / len(texts) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--articles", type=int, default=200)
+    parser.add_argument("--legacy-articles", type=int, default=20)
+    parser.add_argument("--sentences", type=int, default=3)
+    parser.add_argument("--n-process", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    with open(BASE_DIR / "test_suite_responses.json") as f:
+        text = json.load(f)["test_extraction"]["test_text"]
+    # Vary the articles a little so nothing can be cached across them
+    texts = [f"Story {i}. {text}" for i in range(args.articles)]
+
+    summarize_nlp(texts[0], args.sentences)  # Load the trimmed pipeline before timing
+    legacy_ms = ms_per_article(legacy_summarize_nlp, texts[: args.legacy_articles], args.sentences)
+    trimmed_ms = ms_per_article(summarize_nlp, texts, args.sentences)
+    print(f"{'path':>28} {'ms/article':>11}")
+    print(f"{'load per call, full pipeline':>28} {legacy_ms:>11.1f}")
+    print(f"{'persistent trimmed pipeline':>28} {trimmed_ms:>11.1f}")
+
+    print(f"\n{'n_process':>9} {'articles/s':>11}")
+    for n_process in args.n_process:
+        start = time.perf_counter()
+        summarize_nlp_batch(texts, args.sentences, n_process=n_process)
+        print(f"{n_process:>9} {len(texts) / (time.perf_counter() - start):>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
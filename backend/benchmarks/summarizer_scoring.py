@@ -0,0 +1,100 @@
+"""
+Times extractive summary scoring only (the spaCy pass is done beforehand) on
+documents of increasing length: the previous pure-Python loop against the
+vectorized frequency scorer and the TextRank mode.
+
+A blank English pipeline with a rule-based sentencizer builds the documents, so
+this runs without the en_core_web_sm model. Run from the backend folder:
+    python -m benchmarks.summarizer_scoring --sentences 100 1000 10000 --vocabulary-size 800
+"""
+
+import argparse
+import random
+import time
+from heapq import nlargest
+from string import punctuation
+
+import numpy as np
+import spacy
+from spacy.lang.en.stop_words import STOP_WORDS
+
+from src.utils.summarization import summarize_doc
+
+
+def legacy_summarize_doc(doc, num_sentences):
+    """
+    The previous summarize_nlp scoring loop, unchanged.
+    """
+    stopwords = STOP_WORDS
+    punct = punctuation + '\n' + '—' + '“' + '”' + '...'
+    word_frequencies = {}
+    for word in doc:
+        if (word.text.lower() not in stopwords) and (word.text.lower() not in punct):
+            if word.text not in word_frequencies.keys():
+                word_frequencies[word.text] = 1
+            else:
+                word_frequencies[word.text] = word_frequencies[word.text] + 1
+    max_frequency = max(word_frequencies.values())
+    for word in word_frequencies.keys():
+        word_frequencies[word] = word_frequencies[word] / max_frequency
+    sentence_tokens = [sent for sent in doc.sents]
+    sentence_scores = {}
+    standard_deviation = np.std(list(sentence_scores.values()))
+    x = np.linspace(-1, 1, len(sentence_tokens))
+    bell_shape_curve = np.exp(-x**2 / 0.5)
+    for i, sent in enumerate(sentence_tokens):
+        for word in sent:
+            if word.text.lower() in word_frequencies.keys():
+                if sent not in sentence_scores.keys():
+                    sentence_scores[sent] = word_frequencies[word.text.lower()]
+                else:
+                    sentence_scores[sent] += word_frequencies[word.text.lower()]
+        if sent in sentence_scores.keys():
+            sentence_scores[sent] += standard_deviation * bell_shape_curve[i]
+    summary = nlargest(min(num_sentences, len(sentence_tokens)), sentence_scores, key=sentence_scores.get)
+    return [str(sentence).replace("\n", " ").strip() for sentence in summary]
+
+
+def synthetic_document(nlp, num_sentences, vocabulary_size=5000, seed=0):
+    rng = random.Random(seed)
+    vocabulary = ["".join(rng.choices("abcdefghijklmnop", k=6)) for _ in range(vocabulary_size)]
+    sentences = (
+        " ".join(rng.choices(vocabulary, k=rng.randint(8, 25))).capitalize() + "."
+        for _ in range(num_sentences)
+    )
+    return nlp(" ".join(sentences))
+
+
+def best_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sentences", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--summary-sentences", type=int, default=5)
+    parser.add_argument("--vocabulary-size", type=int, default=5000, help="Smaller makes sentences share more words")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    nlp.max_length = 10**8  # No parser or NER, so long documents are fine
+    k = args.summary_sentences
+
+    print(f"{'sentences':>9} {'legacy (ms)':>12} {'frequency (ms)':>15} {'textrank (ms)':>14}")
+    for num_sentences in args.sentences:
+        doc = synthetic_document(nlp, num_sentences, args.vocabulary_size)
+        legacy = best_ms(lambda: legacy_summarize_doc(doc, k), args.repeats)
+        frequency = best_ms(lambda: summarize_doc(doc, k), args.repeats)
+        textrank = best_ms(lambda: summarize_doc(doc, k, method="textrank"), args.repeats)
+        print(f"{num_sentences:>9} {legacy:>12.1f} {frequency:>15.1f} {textrank:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,25 @@
 # from functools import lru_cache
+import threading
+from contextlib import asynccontextmanager
 from typing import Annotated
 
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from src.config.config import Settings, get_settings
 from src.db import models
-from src.db.database import engine
+from src.db.database import add_missing_columns, engine
 from src.router.db import db_router
 from src.router.news import news_router
 from src.router.bias import bias_router
 from src.router.rag import rag_router
 from src.router.summarize import summarize_router
+from src.utils.ingest import upgrade_ingest_jobs_table
+from src.utils.model_registry import model_registry
+from src.utils.news_gateway import get_news_gateway
+from src.utils.scrape_pipeline import get_scrape_pipeline
+from src.utils.watchlist import upgrade_watch_topics_table
 
 # Setting Atttributes
 # Attributes:
@@ -23,9 +31,28 @@ from src.router.summarize import summarize_router
 
 
 models.Base.metadata.create_all(bind=engine)
+# create_all only creates indexes together with new tables, so add any that are missing
+for index in models.Chunk.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
+add_missing_columns(engine, models.IngestJob.__table__)
+add_missing_columns(engine, models.Chunk.__table__)
+add_missing_columns(engine, models.WatchTopic.__table__)
+upgrade_ingest_jobs_table(engine)
+upgrade_watch_topics_table(engine)
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the models in the background, so the server accepts requests straight
+    # away and /ready reports when they are all loaded
+    if get_settings().MODEL_WARMUP:
+        threading.Thread(target=model_registry.warm_up, daemon=True).start()
+    yield
+    await get_news_gateway().aclose()
+    await get_scrape_pipeline().aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 origins = [
     "http://localhost:3000",  # Front end
@@ -50,6 +77,19 @@ async def ping():
     return {"message": "pong"}
 
 
+@app.get("/ready")
+async def ready():
+    """
+    Readiness probe: 200 once every model is loaded, 503 (with per-model state
+    and load times) while they are still loading or if one failed.
+    """
+    ready = model_registry.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "models": model_registry.status()},
+    )
+
+
 # TODO: REMOVE FOR DEPLOYMENT
 @app.get("/env-check")  # ENV IS WORKING :)
 async def env_check(settings: Annotated[Settings, Depends(get_settings)]):
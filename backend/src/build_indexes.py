@@ -0,0 +1,29 @@
+"""
+Builds the pgvector ANN indexes configured in Settings (VECTOR_INDEX_METHOD,
+VECTOR_INDEX_METRICS and the HNSW / IVFFlat build parameters) on
+chunked_data.embedding. The indexes are built CONCURRENTLY, so the API and the
+ingest workers keep reading and writing while it runs. Run it once after the
+first start, and again after changing the index settings:
+    python -m src.build_indexes
+"""
+
+import logging
+
+from src.config.config import get_settings
+from src.db.database import engine
+from src.utils.vector_index import ensure_vector_indexes, vector_index_status
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+
+
+def main():
+    ensure_vector_indexes(engine, get_settings())
+    with engine.connect() as conn:
+        for index in vector_index_status(conn):
+            print(f"{index['name']}: {index['size']}, {'valid' if index['is_valid'] else 'invalid'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,6 +21,79 @@ class Settings(BaseSettings):
     DB_PASSWORD: str
     DB_NAME: str
 
+    # Connection pool, per engine (sync and async) and per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+
+    # pgvector ANN index on chunked_data.embedding ("hnsw", "ivfflat" or "none")
+    VECTOR_INDEX_METHOD: str = "hnsw"
+    VECTOR_INDEX_METRICS: str = "cosine,l2"  # Comma separated: cosine, l2
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 64
+    IVFFLAT_LISTS: int = 100
+
+    # Embedding model backend: "torch", or ONNX Runtime "onnx" (fp32) / "onnx-int8" (dynamically quantized).
+    # The ONNX backends load from EMBEDDING_MODEL_DIR, exported by `python -m src.export_embedding_model`
+    EMBEDDING_BACKEND: str = "torch"
+    EMBEDDING_MODEL_DIR: str = ""  # Empty loads the torch model from the Hugging Face Hub
+
+    # Query embedding cache shared by the retrieval / RAG routes
+    EMBEDDING_CACHE_SIZE: int = 1024
+    EMBEDDING_CACHE_TTL_SECONDS: float = 3600
+
+    # Scraped article pages are served from the scrape_cache table for this long, then revalidated
+    SCRAPE_CACHE_TTL_SECONDS: float = 21600
+    # and deleted by the ingest worker once this old (kept past the TTL for conditional revalidation)
+    SCRAPE_CACHE_RETENTION_SECONDS: float = 604800
+
+    # Scrape executor: global cap on scrapes in flight, AIMD per-domain limits, per-URL deadline
+    SCRAPE_MAX_WORKERS: int = 16
+    SCRAPE_DOMAIN_INITIAL_CONCURRENCY: int = 2
+    SCRAPE_DOMAIN_MAX_CONCURRENCY: int = 8
+    SCRAPE_TIMEOUT_SECONDS: float = 20
+    SCRAPE_TARGET_LATENCY_SECONDS: float = 5  # Slower scrapes halve their domain's limit
+    SCRAPE_PARSE_PROCESSES: int = 2  # Processes parsing downloaded pages (0 parses on a worker thread)
+
+    # Shared NewsAPI gateway: responses are cached in-process for NEWS_API_CACHE_TTL_SECONDS
+    NEWS_API_BASE_URL: str = "https://newsapi.org/v2"
+    NEWS_API_CACHE_TTL_SECONDS: float = 900
+    NEWS_API_TIMEOUT_SECONDS: float = 30
+    NEWS_API_DAILY_QUOTA: int = 100  # Upstream requests per UTC day (the free plan limit)
+    NEWS_API_MAX_CONCURRENCY: int = 4
+    NEWS_API_MAX_RETRIES: int = 3  # Retries of a rate limited (429) request
+    NEWS_API_MAX_PAGES: int = 5  # Result pages of 100 articles fetched by store-query
+
+    # Article chunks: whole sentences packed up to CHUNK_MAX_TOKENS embedding model tokens
+    CHUNK_MAX_TOKENS: int = 0  # 0 (or more than the model takes) uses the model's max_seq_length
+    CHUNK_OVERLAP_TOKENS: int = 32  # Trailing sentences of a chunk repeated at the start of the next
+
+    # Background ingest jobs (store-query), run by `python -m src.worker`
+    INGEST_BATCH_SIZE: int = 50  # Articles scraped, embedded and stored per batch
+    INGEST_MAX_ATTEMPTS: int = 3  # Per article (failed scrapes) and per job
+    INGEST_RETRY_BASE_SECONDS: float = 30  # Backoff after the first failure, doubling after each
+    INGEST_JOB_LEASE_SECONDS: float = 300  # A running job is reclaimed if its worker is silent this long
+    INGEST_POLL_SECONDS: float = 2  # How often an idle worker checks the queue
+
+    # Watchlist topics, polled by the ingest workers at an interval adapted to how many new
+    # articles each poll finds (aiming for WATCHLIST_TARGET_NEW_ARTICLES)
+    WATCHLIST_DEFAULT_INTERVAL_SECONDS: float = 3600
+    WATCHLIST_MIN_INTERVAL_SECONDS: float = 900
+    WATCHLIST_MAX_INTERVAL_SECONDS: float = 86400
+    WATCHLIST_TARGET_NEW_ARTICLES: int = 20
+
+    # Shared async Gemini client (an empty GEMINI_BASE_URL uses the SDK default endpoint)
+    GEMINI_BASE_URL: str = ""
+    GEMINI_MAX_CONCURRENCY: int = 8
+    GEMINI_TIMEOUT_SECONDS: float = 60  # Deadline per call, including retries
+    GEMINI_MAX_RETRIES: int = 3
+    GEMINI_CACHE_TTL_SECONDS: float = 86400  # Cached Gemini answers (0 disables the cache)
+
+    # Estimated token budget for the article context sent by rag-response-full-articles
+    RAG_CONTEXT_TOKEN_BUDGET: int = 4000
+
+    # Load all models in a background thread at startup (otherwise on first use)
+    MODEL_WARMUP: bool = True
+
     model_config = SettingsConfigDict(env_file=".env")
 
 
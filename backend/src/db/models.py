@@ -1,7 +1,20 @@
 import uuid
 
 from pgvector.sqlalchemy import Vector
-from sqlalchemy import TIMESTAMP, UUID, Column, String, text, ForeignKey
+from sqlalchemy import (
+    TIMESTAMP,
+    UUID,
+    Boolean,
+    Column,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import relationship
 
 from src.db.database import Base
@@ -44,6 +57,9 @@ class Chunk(Base):
     content = Column(String)
     embedding = Column(Vector(384))
     created_at = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
+    # Character offsets of the chunk in its article's text (null for chunks stored before they were recorded)
+    start_char = Column(Integer)
+    end_char = Column(Integer)
 
     # Define the foreign key relationship to the Article model.
     article_id = Column(UUID(as_uuid=True), ForeignKey("articles.article_id"))
@@ -52,6 +68,164 @@ class Chunk(Base):
     # 'back_populates' creates the two-way link.
     article = relationship("Article", back_populates="chunks")
 
+    # Supports keyset pagination over (created_at, chunk_id) in the chunk read route
+    __table_args__ = (
+        Index("ix_chunked_data_created_at_chunk_id", "created_at", "chunk_id"),
+    )
+
+
+class ScrapedPage(Base):
+    """
+    This model caches one downloaded and parsed article page, keyed by its
+    normalized URL, so news-extract, bias, summarize and RAG ingest share a
+    single fetch. `etag` / `last_modified` are sent back when revalidating,
+    and `content_hash` lets an unchanged page skip re-parsing.
+    """
+
+    __tablename__ = "scrape_cache"
+
+    url = Column(String, primary_key=True)
+    html = Column(String)
+    title = Column(String)
+    text = Column(String)
+    authors = Column(ARRAY(String))
+    publish_date = Column(TIMESTAMP(timezone=True))
+    etag = Column(String)
+    last_modified = Column(String)
+    content_hash = Column(String)
+    # server_default uses func here, since `text` is a column name in this class
+    fetched_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+
+class GeminiResponse(Base):
+    """
+    This model caches one Gemini answer. `cache_key` hashes the model, system
+    instruction, prompt and the ordered hashes of the context passages, so a
+    change to any contributing chunk or article produces a new key.
+    """
+
+    __tablename__ = "gemini_response_cache"
+
+    cache_key = Column(String, primary_key=True)
+    model = Column(String)
+    response = Column(String)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=text("now()"))
+
+
+class IngestJob(Base):
+    """
+    This model is one queued /rag/store-query ingestion, drained by the
+    `python -m src.worker` processes. Workers claim queued jobs with
+    FOR UPDATE SKIP LOCKED and hold a lease (`locked_at`, refreshed as they go),
+    so a job whose worker died is picked up again once its lease expires.
+
+    `status` is queued, running, succeeded or failed; `stage` is fetching
+    (NewsAPI pages), processing (scrape, embed and store) or done. Jobs
+    queued by the watchlist scheduler set `topic_id`, and only ask NewsAPI
+    for articles published between `from_date` and `to_date`. `query` is sent to NewsAPI as
+    submitted (its AND / OR / NOT operators are case sensitive); duplicates
+    are matched on the normalized `query_key`, with the same ordering, dates
+    and topic.
+    """
+
+    __tablename__ = "ingest_jobs"
+
+    job_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    query = Column(String, nullable=False)
+    query_key = Column(String)  # normalize_query(query), for spotting duplicate submissions
+    idempotency_key = Column(String, unique=True)
+    status = Column(String, nullable=False, server_default="queued")
+    stage = Column(String, nullable=False, server_default="fetching")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    run_after = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String)
+    locked_at = Column(TIMESTAMP(timezone=True))
+    pages_fetched = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(String)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    finished_at = Column(TIMESTAMP(timezone=True))
+    from_date = Column(TIMESTAMP(timezone=True))
+    to_date = Column(TIMESTAMP(timezone=True))
+    total_results = Column(Integer)  # NewsAPI's totalResults for the query
+    sort_by = Column(String, nullable=False, server_default="relevancy")
+    topic_id = Column(
+        UUID(as_uuid=True), ForeignKey("watch_topics.topic_id", ondelete="SET NULL")
+    )
+
+    articles = relationship("IngestJobArticle", back_populates="job")
+
+    __table_args__ = (
+        Index("ix_ingest_jobs_status_run_after", "status", "run_after"),
+        # At most one queued or running job per request: the query (ignoring case and
+        # spacing), its ordering, date range and watchlist topic. Repeated submissions
+        # share it, but a topic poll and an ad-hoc job for the same query don't
+        Index(
+            "uq_ingest_jobs_active_request",
+            query_key,
+            sort_by,
+            func.coalesce(from_date, text("'-infinity'::timestamptz")),
+            func.coalesce(to_date, text("'infinity'::timestamptz")),
+            func.coalesce(topic_id, text("'00000000-0000-0000-0000-000000000000'::uuid")),
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+
+class IngestJobArticle(Base):
+    """
+    This model is one NewsAPI article found by an ingest job, with the
+    NewsAPI fields in `article`. `state` records its progress: pending,
+    scraped, embedded, stored, skipped (already stored before the job) or
+    failed. A failed scrape is retried with exponential backoff
+    (`next_attempt_at`) before the article is stored from its NewsAPI content.
+    """
+
+    __tablename__ = "ingest_job_articles"
+
+    job_id = Column(UUID(as_uuid=True), ForeignKey("ingest_jobs.job_id"), primary_key=True)
+    url = Column(String, primary_key=True)
+    article = Column(JSONB)
+    state = Column(String, nullable=False, server_default="pending")
+    attempts = Column(Integer, nullable=False, server_default="0")
+    next_attempt_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(String)
+
+    job = relationship("IngestJob", back_populates="articles")
+
+
+class WatchTopic(Base):
+    """
+    This model is one watchlist topic, polled by the ingest workers'
+    scheduler. `last_published_at` is the high-water mark: each poll only
+    asks NewsAPI for articles published since then. `poll_interval_seconds`
+    shrinks when polls find many new articles and grows when they find none.
+
+    A poll with more results than it may fetch only gets the newest ones. The
+    gap below them is then backfilled first: the next polls ask for articles
+    published up to `backfill_until` (the oldest one fetched so far), and the
+    mark only moves up to `backfill_newest` once the gap is closed.
+    """
+
+    __tablename__ = "watch_topics"
+
+    topic_id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    query = Column(String, unique=True, nullable=False)
+    query_key = Column(String)  # normalize_query(query), so a topic is only added once
+    enabled = Column(Boolean, nullable=False, server_default=text("true"))
+    poll_interval_seconds = Column(Float, nullable=False)
+    last_published_at = Column(TIMESTAMP(timezone=True))
+    backfill_until = Column(TIMESTAMP(timezone=True))
+    backfill_newest = Column(TIMESTAMP(timezone=True))
+    next_poll_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=func.now())
+    last_polled_at = Column(TIMESTAMP(timezone=True))
+    last_new_articles = Column(Integer)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("uq_watch_topics_query_key", "query_key", unique=True),
+    )
+
 
 """
 Old Def
@@ -70,6 +70,8 @@ class ChunkRead(BaseModel):
     embedding: List[float]
     created_at: datetime
     article_id: UUID
+    start_char: Optional[int] = None
+    end_char: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -85,10 +87,26 @@ class ChunkReadNoEmbedding(BaseModel):
     content: str
     created_at: datetime
     article_id: UUID
+    start_char: Optional[int] = None
+    end_char: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
 
+# Used for the paginated chunk read route. content / embedding are only set when requested
+class ChunkPageItem(BaseModel):
+    chunk_id: UUID
+    created_at: datetime
+    article_id: UUID
+    content: Optional[str] = None
+    embedding: Optional[List[float]] = None
+
+
+class ChunkPage(BaseModel):
+    items: List[ChunkPageItem]
+    next_cursor: Optional[str] = None
+
+
 # Base class of properties
 class ArticleBase(BaseModel):
     """
@@ -133,6 +151,25 @@ class ArticleReadNoEmbeddings(ArticleBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+# Used for the paginated article read route. text is only set when requested
+class ArticlePageItem(BaseModel):
+    article_id: UUID
+    url: str
+    urlToImage: Optional[str] = None
+    source: Optional[str] = None
+    author: Optional[str] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    publishedAt: Optional[datetime] = None
+    scrape_successful: Optional[str] = None
+    text: Optional[str] = None
+
+
+class ArticlePage(BaseModel):
+    items: List[ArticlePageItem]
+    next_cursor: Optional[str] = None
+
+
 # Used for RAG routes, includes article name and image URL for display purposes
 class ArticleRagRead(BaseModel):
     url: str
@@ -154,3 +191,69 @@ class ChunkReadWithArticleInfo(ChunkReadNoEmbedding):
 class RagResponse(BaseModel):
     articles: List[ArticleRagRead]
     gemini_response: str
+
+
+# Used by the vector index admin route
+class VectorIndexStatus(BaseModel):
+    name: str
+    method: str
+    definition: str
+    size_bytes: int
+    size: str
+    is_valid: bool
+    is_ready: bool
+    build_phase: Optional[str] = None
+    blocks_done: Optional[int] = None
+    blocks_total: Optional[int] = None
+    tuples_done: Optional[int] = None
+    tuples_total: Optional[int] = None
+
+
+# Returned by store-query when it queues (or finds) an ingest job
+class IngestJobQueued(BaseModel):
+    job_id: UUID
+    status: str
+    created: bool
+
+
+# Used by the ingest job status route
+class IngestJobStatus(BaseModel):
+    job_id: UUID
+    query: str
+    status: str
+    stage: str
+    attempts: int
+    pages_fetched: int
+    articles: dict[str, int] = Field(..., description="Number of the job's articles in each state.")
+    articles_retrying: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+# Used by the watchlist routes
+class WatchTopicCreate(BaseModel):
+    query: str
+    poll_interval_seconds: Optional[float] = Field(
+        None, description="Starting interval between polls (defaults to WATCHLIST_DEFAULT_INTERVAL_SECONDS)."
+    )
+
+
+class WatchTopicUpdate(BaseModel):
+    enabled: Optional[bool] = None
+    poll_interval_seconds: Optional[float] = None
+
+
+class WatchTopicRead(BaseModel):
+    topic_id: UUID
+    query: str
+    enabled: bool
+    poll_interval_seconds: float
+    last_published_at: Optional[datetime] = None
+    backfill_until: Optional[datetime] = None
+    next_poll_at: datetime
+    last_polled_at: Optional[datetime] = None
+    last_new_articles: Optional[int] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
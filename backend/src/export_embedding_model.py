@@ -0,0 +1,34 @@
+"""
+Exports the miniLM-L6 embedding model to a local folder for every EMBEDDING_BACKEND:
+the torch weights, the ONNX model (onnx/model.onnx), and its dynamically
+quantized int8 copy (onnx/model_qint8.onnx). Point EMBEDDING_MODEL_DIR at it:
+    python -m src.export_embedding_model /models/all-MiniLM-L6-v2 --quantization avx2
+
+--quantization picks the int8 kernels for the CPUs that will run the model
+(arm64, avx2, avx512 or avx512_vnni).
+"""
+
+import argparse
+
+from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+from src.utils.local_models import EMBEDDING_MODEL_NAME
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("output_dir")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME)
+    parser.add_argument("--quantization", default="avx2", choices=["arm64", "avx2", "avx512", "avx512_vnni"])
+    args = parser.parse_args()
+
+    SentenceTransformer(args.model).save(args.output_dir)
+    # Loading a model without ONNX files on the onnx backend exports it; saving writes onnx/model.onnx
+    onnx_model = SentenceTransformer(args.model, backend="onnx")
+    onnx_model.save(args.output_dir)
+    export_dynamic_quantized_onnx_model(onnx_model, args.quantization, args.output_dir, file_suffix="qint8")
+    print(f"Exported {args.model} to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
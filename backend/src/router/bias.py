@@ -9,21 +9,30 @@ from src.utils.bias_detection import (
     NBScore,
 )
 
+from src.utils.model_registry import model_registry
+
 from pathlib import Path
 from typing import Optional, Dict
+import asyncio
 import json
 
 # Initialize router
 bias_router = APIRouter()
 
-# Load models and data (assuming you are in the backend directory) ADJUST IF NEEDED!
+# Register models and data (assuming you are in the backend directory) ADJUST IF NEEDED!
+# They are loaded on first use or by the startup warm-up, not at import time
 BASE_DIR = Path(__file__).resolve().parent.parent
-source_checker = SourceChecker(str(BASE_DIR / "models/sourcebias_probabilities.csv"))
-sentence_detector = SentenceClaimDetector(
-    str(BASE_DIR / "models/claimdetection_oneClassSVM.pkl")
+model_registry.register(
+    "source_checker",
+    lambda: SourceChecker(str(BASE_DIR / "models/sourcebias_probabilities.csv")),
+)
+model_registry.register(
+    "sentence_detector",
+    lambda: SentenceClaimDetector(str(BASE_DIR / "models/claimdetection_oneClassSVM.pkl")),
 )
-bias_detector = BiasDetector(
-    str(BASE_DIR / "models/DistilBert_PoliticalBias_FineTuned/")
+model_registry.register(
+    "bias_detector",
+    lambda: BiasDetector(str(BASE_DIR / "models/DistilBert_PoliticalBias_FineTuned/")),
 )
 
 
@@ -36,7 +45,19 @@ class ArticleURL(BaseModel):
 
 
 @bias_router.post("/analyze")
-def analyze_article(input: ArticleURL):
+async def analyze_article(input: ArticleURL):
+    # Step 1: Scrape article
+    article_data = await NewsScrape(input.url)
+    if not article_data or not article_data["text"]:
+        raise HTTPException(
+            status_code=400, detail="Failed to scrape article or extract text."
+        )
+
+    # The model steps are CPU-bound, so they run on a worker thread
+    return await asyncio.to_thread(score_article, input, article_data)
+
+
+def score_article(input: ArticleURL, article_data: dict):
 
     # Step 0: Weights
     priors = input.priors or { # Default probabilities for how biased something is.
@@ -57,12 +78,9 @@ def analyze_article(input: ArticleURL):
         "sentence": 0.025
     }
 
-    # Step 1: Scrape article
-    article_data = NewsScrape(input.url)
-    if not article_data or not article_data["text"]:
-        raise HTTPException(
-            status_code=400, detail="Failed to scrape article or extract text."
-        )
+    source_checker = model_registry.get("source_checker")
+    sentence_detector = model_registry.get("sentence_detector")
+    bias_detector = model_registry.get("bias_detector")
 
     # Step 2: Source bias
     source_name = article_data["source"]
@@ -82,8 +100,11 @@ def analyze_article(input: ArticleURL):
 
     # Step 4: Sentence-level claims
     sentence_outputs = sentence_detector.text_predict(
-        article_data["text"], claim_threshold=thresholds["claims"]
+        article_data["text"], claim_threshold=thresholds["claims"], sentences=article_data["sentences"]
     )
+    # Run every claim sentence through the bias model in length-bucketed batches
+    claim_texts = [sent["text"] for sent in sentence_outputs if sent['label'] == "claim"]
+    claim_predictions = iter(bias_detector.batch_predict(claim_texts))
     sentence_probs = []
     sentence_predictions = []
     num_political = 0
@@ -91,7 +112,7 @@ def analyze_article(input: ArticleURL):
         probs = priors
         label = "not claim"
         if sent['label'] == "claim":
-            pred = bias_detector.text_predict(sent["text"])
+            pred = next(claim_predictions)
             probs = {
                 "left": float(pred["probability"][0]),
                 "center": float(pred["probability"][1]),
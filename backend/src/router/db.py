@@ -1,10 +1,26 @@
+import base64
 import logging
+from datetime import datetime
+from typing import Annotated
+from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from src.config.config import Settings, get_settings
 from src.db import models, schemas
-from src.db.database import get_db
+from src.db.database import AsyncSessionLocal, engine, get_async_db, get_db
+from src.utils.vector_index import (
+    VECTOR_INDEX_METHODS,
+    VECTOR_INDEX_OPCLASSES,
+    create_vector_index,
+    drop_vector_index,
+    vector_index_name,
+    vector_index_status,
+)
 
 db_router = APIRouter()
 
@@ -14,23 +30,198 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-@db_router.get("/read-db-chunks/", response_model=list[schemas.ChunkRead])
-async def read_db_chunks(db: Session = Depends(get_db)):
+# Rows fetched per round trip from the server-side cursor when streaming
+STREAM_BATCH_SIZE = 1000
+
+
+def _encode_cursor(*values) -> str:
+    return base64.urlsafe_b64encode("|".join(str(v) for v in values).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> list[str]:
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid cursor"
+        )
+
+
+def _chunk_query(cursor: str | None, include_content: bool, include_embedding: bool):
     """
-    Retrieves all chunk entries from the database.
+    Keyset query over chunks ordered by (created_at, chunk_id), selecting only the requested columns.
+    """
+    columns = [models.Chunk.chunk_id, models.Chunk.created_at, models.Chunk.article_id]
+    if include_content:
+        columns.append(models.Chunk.content)
+    if include_embedding:
+        columns.append(models.Chunk.embedding)
+    query = select(*columns).order_by(models.Chunk.created_at, models.Chunk.chunk_id)
+
+    if cursor:
+        try:
+            created_at, chunk_id = _decode_cursor(cursor)
+            after = (datetime.fromisoformat(created_at), UUID(chunk_id))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid cursor"
+            )
+        query = query.where(tuple_(models.Chunk.created_at, models.Chunk.chunk_id) > after)
+    return query
+
+
+def _article_query(cursor: str | None, include_text: bool):
+    """
+    Keyset query over articles ordered by article_id, selecting only the requested columns.
+    """
+    columns = [
+        models.Article.article_id,
+        models.Article.url,
+        models.Article.urlToImage,
+        models.Article.source,
+        models.Article.author,
+        models.Article.title,
+        models.Article.description,
+        models.Article.publishedAt,
+        models.Article.scrape_successful,
+    ]
+    if include_text:
+        columns.append(models.Article.text)
+    query = select(*columns).order_by(models.Article.article_id)
+
+    if cursor:
+        try:
+            after = UUID(_decode_cursor(cursor)[0])
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid cursor"
+            )
+        query = query.where(models.Article.article_id > after)
+    return query
+
+
+async def _stream_ndjson(query, item_schema):
+    """
+    Streams query results as NDJSON through a server-side cursor, so memory stays
+    flat regardless of table size. The session is opened here rather than through
+    Depends, because dependencies are closed before a streaming body is sent.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for rows in result.mappings().partitions():
+            yield "".join(
+                item_schema(**row).model_dump_json(exclude_unset=True) + "\n"
+                for row in rows
+            )
+
+
+@db_router.get(
+    "/read-db-chunks/",
+    response_model=schemas.ChunkPage,
+    response_model_exclude_unset=True,
+)
+async def read_db_chunks(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: str | None = None,
+    include_content: bool = False,
+    include_embedding: bool = False,
+    stream: bool = False,
+):
+    """
+    Retrieves chunk entries a page at a time, ordered by (created_at, chunk_id).
+    Pass the returned next_cursor to get the following page. Content and embeddings
+    are only loaded when asked for. With stream=true every chunk after the cursor is
+    returned as NDJSON instead.
     """
     logger.info("Reading DB Chunks")
-    entries = db.query(models.Chunk).all()
-    return [schemas.ChunkRead.model_validate(entry) for entry in entries]
+    query = _chunk_query(cursor, include_content, include_embedding)
+    if stream:
+        return StreamingResponse(
+            _stream_ndjson(query, schemas.ChunkPageItem),
+            media_type="application/x-ndjson",
+        )
+
+    # Fetch one extra row to know whether there is a next page
+    rows = (await db.execute(query.limit(limit + 1))).mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_cursor(last["created_at"].isoformat(), last["chunk_id"])
+    return schemas.ChunkPage(
+        items=[schemas.ChunkPageItem(**row) for row in rows[:limit]],
+        next_cursor=next_cursor,
+    )
 
 
 @db_router.get(
-    "/read-db-articles/", response_model=list[schemas.ArticleReadNoEmbeddings]
+    "/read-db-articles/",
+    response_model=schemas.ArticlePage,
+    response_model_exclude_unset=True,
 )
-async def read_db_articles(db: Session = Depends(get_db)):
+async def read_db_articles(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+    cursor: str | None = None,
+    include_text: bool = False,
+    stream: bool = False,
+):
     """
-    Retrieves all article entries from the database.
+    Retrieves article entries a page at a time, ordered by article_id.
+    Article text is only loaded when asked for. With stream=true every article
+    after the cursor is returned as NDJSON instead.
     """
     logger.info("Reading DB Articles")
-    entries = db.query(models.Article).all()
-    return [schemas.ArticleReadNoEmbeddings.model_validate(entry) for entry in entries]
+    query = _article_query(cursor, include_text)
+    if stream:
+        return StreamingResponse(
+            _stream_ndjson(query, schemas.ArticlePageItem),
+            media_type="application/x-ndjson",
+        )
+
+    rows = (await db.execute(query.limit(limit + 1))).mappings().all()
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = _encode_cursor(rows[limit - 1]["article_id"])
+    return schemas.ArticlePage(
+        items=[schemas.ArticlePageItem(**row) for row in rows[:limit]],
+        next_cursor=next_cursor,
+    )
+
+
+@db_router.get("/vector-indexes/", response_model=list[schemas.VectorIndexStatus])
+def read_vector_indexes(db: Session = Depends(get_db)):
+    """
+    Reports the ANN indexes on chunked_data.embedding, with their size and build state.
+    """
+    return vector_index_status(db)
+
+
+def _validate_vector_index(method: str, metric: str):
+    if method not in VECTOR_INDEX_METHODS or metric not in VECTOR_INDEX_OPCLASSES:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"method must be one of {list(VECTOR_INDEX_METHODS)} and metric one of {list(VECTOR_INDEX_OPCLASSES)}",
+        )
+
+
+@db_router.post("/vector-indexes/", status_code=status.HTTP_202_ACCEPTED)
+async def build_vector_index(
+    background_tasks: BackgroundTasks,
+    settings: Annotated[Settings, Depends(get_settings)],
+    method: str = "hnsw",
+    metric: str = "cosine",
+):
+    """
+    Starts a CREATE INDEX CONCURRENTLY in the background. Poll GET /vector-indexes/ for progress.
+    """
+    _validate_vector_index(method, metric)
+    background_tasks.add_task(create_vector_index, engine, method, metric, settings)
+    return {"message": f"Building {vector_index_name(method, metric)}"}
+
+
+@db_router.delete("/vector-indexes/")
+def remove_vector_index(method: str = "hnsw", metric: str = "cosine"):
+    _validate_vector_index(method, metric)
+    drop_vector_index(engine, method, metric)
+    return {"message": f"Dropped {vector_index_name(method, metric)}"}
@@ -3,12 +3,14 @@ import re
 from datetime import datetime, timedelta
 from typing import Annotated
 
-import requests
+import httpx
 from fastapi import APIRouter, Depends, HTTPException, status
 
 from src.config.config import Settings, get_settings
 from src.db.schemas import ArticleContentResponse, NewsApiResponse
-from src.utils.news_functions import call_news_api, extract_newspaper_contents
+from src.utils.news_functions import extract_newspaper_contents
+from src.utils.news_gateway import get_news_gateway
+from src.utils.scrape_executor import get_scrape_executor
 
 news_router = APIRouter()
 
@@ -26,9 +28,7 @@ logger = logging.getLogger(__name__)
 
 # Usage: http://localhost:8000/api/v1/top-stories/?query=stocky or http://localhost:8000/api/v1/top-stories/
 @news_router.get("/top-stories/", response_model=NewsApiResponse)
-async def top_stories(
-    settings: Annotated[Settings, Depends(get_settings)], query: str = "stock"
-):
+async def top_stories(query: str = "stock"):
     # query = keyword if keyword else "stock"
 
     try:
@@ -36,12 +36,15 @@ async def top_stories(
         one_week_ago = current_datetime - timedelta(weeks=1)
         one_week_ago_date_only = one_week_ago.date()
 
-        news_api_response = call_news_api(
-            query, one_week_ago_date_only.isoformat(), settings.NEWS_API_KEY
+        news_api_data = await get_news_gateway().get(
+            "everything",
+            query,
+            from_date=one_week_ago_date_only.isoformat(),
+            sort_by="relevancy",
         )
-        logger.debug(f"Received response from News API: {news_api_response}")
+        logger.debug(f"Received response from News API: {news_api_data}")
 
-    except requests.exceptions.HTTPError as err:
+    except httpx.HTTPStatusError as err:
         raise HTTPException(
             status_code=err.response.status_code,
             detail=f"External News API error: {err.response.text}",
@@ -52,7 +55,23 @@ async def top_stories(
             detail=f"An unexpected error occurred: {e}",
         )
 
-    return news_api_response.json()
+    return news_api_data
+
+
+@news_router.get("/news-api-stats/")
+async def news_api_stats():
+    """
+    Upstream requests made today against the NewsAPI quota, and cache / coalescing counters.
+    """
+    return get_news_gateway().stats()
+
+
+@news_router.get("/scrape-stats/")
+async def scrape_stats():
+    """
+    Scrape executor load, and each domain's current concurrency limit, latency and error counts.
+    """
+    return get_scrape_executor().stats()
 
 
 # TODO: Review the story_url arg. Should it have default?
@@ -77,7 +96,7 @@ async def extract_news(
             detail="Received invalid URL format",
         )
 
-    extracted_content = extract_newspaper_contents(story_url)
+    extracted_content = await extract_newspaper_contents(story_url)
 
     if not extracted_content:  # 500 error, no content
         logger.error(f"Failed to extract content from {story_url}")
@@ -1,29 +1,30 @@
 import logging
+import uuid
 from typing import Annotated
 
 import asyncio
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from sqlalchemy import select
-from pgvector.sqlalchemy import Vector
 from sentence_transformers import SentenceTransformer
-import httpx
-
 
 from src.config.config import Settings, get_settings
 from src.db import models, schemas
-from src.db.database import get_db
-from src.utils import gemini
-from src.utils.news_functions import query_news_api, extract_newspaper_contents
-from src.utils.database import filter_out_existing_articles, store_articles
+from src.db.database import get_async_db
+from src.utils.ingest import enqueue_ingest_job, get_job_status
 from src.utils.local_models import (
     # get_keybert_model,
     # extract_main_keyword,
     get_embeddings_model,
-    add_embeddings,
-    chunkify,
+    embed_query,
 )
-from src.utils.gemini import read_with_gemini
+from src.utils.context_builder import build_context
+from src.utils.embedding_cache import get_query_embedding_cache, normalize_query
+from src.utils.gemini import read_with_gemini, read_with_gemini_stream
+from src.utils.gemini_cache import get_gemini_response_cache
+from src.utils.sse import sse_event, sse_response
+from src.utils.vector_index import set_vector_search_params_async
 
 rag_router = APIRouter()
 
@@ -33,113 +34,118 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-async def scrape_and_embed_article(article_data: dict, model):
+@rag_router.post(
+    "/store-query/", response_model=schemas.IngestJobQueued, status_code=status.HTTP_202_ACCEPTED
+)
+async def store_query(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    query: str = "stock",
+    idempotency_key: Annotated[str | None, Header()] = None,
+):
     """
-    Asynchronously scrapes, chunks, and embeds a single article.
+    Queues an ingest job for the query (NewsAPI fetch, scrape, chunk, embed and
+    store, run by the `python -m src.worker` processes) and returns its job_id
+    straight away. Submitting the same Idempotency-Key again, or the same query
+    while its job is still queued or running, returns the existing job.
     """
-    try:
-        # Use httpx for async requests
-        article_content_dict = await extract_newspaper_contents(article_data["url"])
+    if not query or len(query.strip()) == 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty query")
 
-        if not article_content_dict:
-            article_data["text"] = article_data.get("content", "")
-            article_data["scrape_successful"] = False
-        else:
-            article_data["text"] = article_content_dict.get("text", "")
-            article_data["scrape_successful"] = True
+    job, created = await enqueue_ingest_job(db, query, idempotency_key)
+    logger.info(f"Ingest job {job.job_id} for {job.query!r} ({'queued' if created else 'existing'})")
+    return schemas.IngestJobQueued(job_id=job.job_id, status=job.status, created=created)
+
+
+@rag_router.get("/ingest-jobs/{job_id}", response_model=schemas.IngestJobStatus)
+async def ingest_job_status(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    job_id: uuid.UUID,
+):
+    """
+    Progress of an ingest job: its status and stage, and how many of its
+    articles are pending, scraped, embedded, stored, skipped or failed.
+    """
+    job_status = await get_job_status(db, job_id)
+    if job_status is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ingest job not found")
+    return job_status
 
-    except Exception as e:
-        # Handle scraping errors gracefully without stopping the entire process
-        print(f"Error scraping {article_data.get('url')}: {e}")
-        article_data["text"] = article_data.get("content", "")
-        article_data["scrape_successful"] = False
 
-    # Chunk and embed the content
-    chunk_list = chunkify(article_data.get("text", ""))
-    embeddings_list = add_embeddings(chunk_list, model)
+@rag_router.post(
+    "/watchlist/", response_model=schemas.WatchTopicRead, status_code=status.HTTP_201_CREATED
+)
+async def create_watch_topic(
+    topic: schemas.WatchTopicCreate,
+    settings: Annotated[Settings, Depends(get_settings)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+):
+    """
+    Adds a topic to the watchlist. Its first poll is queued by the next worker
+    pass, and later polls only ingest articles published since the last one.
+    """
+    # Kept as submitted, since NewsAPI's AND / OR / NOT operators are case sensitive
+    query, query_key = topic.query.strip(), normalize_query(topic.query)
+    if not query:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty query")
+    if await db.scalar(select(models.WatchTopic).where(models.WatchTopic.query_key == query_key)):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Topic already on the watchlist")
+
+    watch_topic = models.WatchTopic(
+        query=query,
+        query_key=query_key,
+        poll_interval_seconds=topic.poll_interval_seconds
+        or settings.WATCHLIST_DEFAULT_INTERVAL_SECONDS,
+    )
+    db.add(watch_topic)
+    await db.commit()
+    await db.refresh(watch_topic)
+    return watch_topic
 
-    # Attach the processed data to the article dictionary
-    article_data["chunks"] = chunk_list
-    article_data["embeddings_list"] = embeddings_list
 
-    return article_data
+@rag_router.get("/watchlist/", response_model=list[schemas.WatchTopicRead])
+async def read_watchlist(db: Annotated[AsyncSession, Depends(get_async_db)]):
+    return (
+        await db.scalars(select(models.WatchTopic).order_by(models.WatchTopic.created_at))
+    ).all()
 
 
-@rag_router.post("/store-query/")
-async def store_query(
-    embedding_model: Annotated[SentenceTransformer, Depends(get_embeddings_model)],
-    settings: Annotated[Settings, Depends(get_settings)],
-    db: Annotated[Session, Depends(get_db)],
-    query: str = "stock",
+async def _get_watch_topic(db, topic_id):
+    watch_topic = await db.get(models.WatchTopic, topic_id)
+    if watch_topic is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Watchlist topic not found")
+    return watch_topic
+
+
+@rag_router.get("/watchlist/{topic_id}", response_model=schemas.WatchTopicRead)
+async def read_watch_topic(
+    db: Annotated[AsyncSession, Depends(get_async_db)], topic_id: uuid.UUID
 ):
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            news_api_response = await query_news_api(
-                client,
-                query,
-                settings.NEWS_API_KEY,
-                everything=True,
-                sortBy="relevancy",
-            )
-            news_api_response.raise_for_status()
-        # Use httpx for async requests
-    except httpx.HTTPStatusError as err:
-        raise HTTPException(
-            status_code=err.response.status_code,
-            detail=f"External News API error: {err.response.text}",
-        )
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An unexpected error occurred: {e}",
-        )
+    return await _get_watch_topic(db, topic_id)
 
-    news_api_data = news_api_response.json()
-    articles_to_scrape = filter_out_existing_articles(
-        news_api_data.get("articles", []), db
-    )
-    logger.info(
-        f"Found {len(news_api_data.get('articles', []))} related articles, {articles_to_scrape} need new embedding"
-    )
 
-    if len(articles_to_scrape) == 0:
-        return {"message": "Exited early, no new articles found to store"}
-
-    # Transform the data from the News API response
-    article_properties = [
-        "url",
-        "urlToImage",
-        "source",
-        "author",
-        "title",
-        "description",
-        "publishedAt",
-        "content",
-    ]
-    articles_to_embed = []
-    for article in articles_to_scrape:
-        to_embed = {}
-        for prop in article_properties:
-            if prop == "source":
-                to_embed["source"] = article.get("source", {}).get("name")
-            else:
-                to_embed[prop] = article.get(prop)
-        articles_to_embed.append(to_embed)
-
-    # Use asyncio.gather to process all articles concurrently
-    processed_articles = await asyncio.gather(
-        *[
-            scrape_and_embed_article(article, embedding_model)
-            for article in articles_to_embed
-        ]
-    )
+@rag_router.patch("/watchlist/{topic_id}", response_model=schemas.WatchTopicRead)
+async def update_watch_topic(
+    update: schemas.WatchTopicUpdate,
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    topic_id: uuid.UUID,
+):
+    """
+    Pauses / resumes a topic, or resets its polling interval.
+    """
+    watch_topic = await _get_watch_topic(db, topic_id)
+    for field, value in update.model_dump(exclude_unset=True, exclude_none=True).items():
+        setattr(watch_topic, field, value)
+    await db.commit()
+    await db.refresh(watch_topic)
+    return watch_topic
 
-    # Call the storage function just once with the list of processed articles.
-    store_articles(processed_articles, db)
 
-    return {
-        "message": f"Successfully processed and stored {len(processed_articles)} articles."
-    }
+@rag_router.delete("/watchlist/{topic_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_watch_topic(
+    db: Annotated[AsyncSession, Depends(get_async_db)], topic_id: uuid.UUID
+):
+    await db.delete(await _get_watch_topic(db, topic_id))
+    await db.commit()
 
 
 @rag_router.get(
@@ -147,23 +153,27 @@ async def store_query(
 )
 async def retrieve_relevant_chunks_l2(
     embedding_model: Annotated[SentenceTransformer, Depends(get_embeddings_model)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     query: str = "stock",
+    ef_search: Annotated[int | None, Query(ge=1, le=1000)] = None,
+    probes: Annotated[int | None, Query(ge=1)] = None,
 ):
     if not query or len(query.strip()) == 0:
         return []
 
-    # Generate a single embedding vector for the query.
-    # The output is a numpy array.
+    # Generate a single embedding vector for the query (cached across requests).
     logger.info(f"Embedding query: {query}")
-    query_vector = embedding_model.encode(query, convert_to_tensor=False).tolist()
+    query_vector = await embed_query(query, embedding_model)
 
     # The query is now a list of floats, which is the expected format for pgvector.
-    # Correctly use the l2_distance method with a single vector.
-    results = db.scalars(
-        select(models.Chunk)
-        .order_by(models.Chunk.embedding.l2_distance(query_vector))
-        .limit(5)
+    # Optionally widen/narrow the ANN search for this request (recall vs latency)
+    await set_vector_search_params_async(db, ef_search=ef_search, probes=probes)
+    results = (
+        await db.scalars(
+            select(models.Chunk)
+            .order_by(models.Chunk.embedding.l2_distance(query_vector))
+            .limit(5)
+        )
     ).all()  # Use .all() to get a list of objects
 
     # The .all() method materializes the results into a list of model instances,
@@ -177,24 +187,28 @@ async def retrieve_relevant_chunks_l2(
 )
 async def retrieve_relevant_chunks_cosine(
     embedding_model: Annotated[SentenceTransformer, Depends(get_embeddings_model)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     query: str = "stock",
+    ef_search: Annotated[int | None, Query(ge=1, le=1000)] = None,
+    probes: Annotated[int | None, Query(ge=1)] = None,
 ):
     if not query or len(query.strip()) == 0:
         return []
 
-    # Generate a single embedding vector for the query.
-    # The output is a numpy array.
+    # Generate a single embedding vector for the query (cached across requests).
     logger.info(f"Embedding query: {query}")
-    query_vector = embedding_model.encode(query, convert_to_tensor=False).tolist()
+    query_vector = await embed_query(query, embedding_model)
 
     # The query is now a list of floats, which is the expected format for pgvector.
-    # Correctly use the l2_distance method with a single vector.
-    results = db.scalars(
-        select(models.Chunk)
-        .options(joinedload(models.Chunk.article))
-        .order_by(models.Chunk.embedding.cosine_distance(query_vector))
-        .limit(5)
+    # Optionally widen/narrow the ANN search for this request (recall vs latency)
+    await set_vector_search_params_async(db, ef_search=ef_search, probes=probes)
+    results = (
+        await db.scalars(
+            select(models.Chunk)
+            .options(joinedload(models.Chunk.article))
+            .order_by(models.Chunk.embedding.cosine_distance(query_vector))
+            .limit(5)
+        )
     ).all()
 
     # The .all() method materializes the results into a list of model instances,
@@ -209,47 +223,90 @@ async def retrieve_relevant_chunks_cosine(
 async def rag_response_full_articles(
     embedding_model: Annotated[SentenceTransformer, Depends(get_embeddings_model)],
     settings: Annotated[Settings, Depends(get_settings)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     query: str,
+    ef_search: Annotated[int | None, Query(ge=1, le=1000)] = None,
+    probes: Annotated[int | None, Query(ge=1)] = None,
 ):
     if not query or len(query.strip()) == 0:
         return []
 
-    # Generate a single embedding vector for the query.
-    # The output is a numpy array.
+    # Generate a single embedding vector for the query (cached across requests).
     logger.info(f"Embedding query: {query}")
-    query_vector = embedding_model.encode(query, convert_to_tensor=False).tolist()
+    query_vector = await embed_query(query, embedding_model)
 
     # The query is now a list of floats, which is the expected format for pgvector.
-    # Correctly use the l2_distance method with a single vector.
-    relevant_chunks = db.scalars(
-        select(models.Chunk)
-        .options(joinedload(models.Chunk.article))
-        .order_by(models.Chunk.embedding.cosine_distance(query_vector))
-        .limit(5)
-    ).all()
-    unique_article_ids = {chunk.article.article_id for chunk in relevant_chunks}
-    full_articles = db.scalars(
-        select(models.Article).where(models.Article.article_id.in_(unique_article_ids))
+    # Optionally widen/narrow the ANN search for this request (recall vs latency)
+    await set_vector_search_params_async(db, ef_search=ef_search, probes=probes)
+    relevant_chunks = (
+        await db.scalars(
+            select(models.Chunk)
+            .options(joinedload(models.Chunk.article))
+            .order_by(models.Chunk.embedding.cosine_distance(query_vector))
+            .limit(5)
+        )
     ).all()
+    # One passage per article, represented by its best matching chunk
+    best_chunks = {}
+    for chunk in relevant_chunks:
+        best_chunks.setdefault(chunk.article_id, chunk)
+    full_articles = [chunk.article for chunk in best_chunks.values()]
+    passages = [
+        {"title": chunk.article.title, "text": chunk.article.text, "embedding": chunk.embedding}
+        for chunk in best_chunks.values()
+    ]
 
-    gemini_context_list = []
-    for article in full_articles:
-        combined_context = f"Article Title: {article.title}\n"
-        combined_context += f"Article Text: {article.text}\n\n"
-        gemini_context_list.append(combined_context)
+    # Rank, de-duplicate and compress the articles to fit the token budget (CPU bound)
+    gemini_context_list, _, context_tokens = await asyncio.to_thread(
+        build_context, passages, query_vector, settings.RAG_CONTEXT_TOKEN_BUDGET
+    )
 
-    # settings.GEMINI_API_KEY: str
-    gemini_response = read_with_gemini(gemini_context_list, settings.GEMINI_API_KEY)
+    gemini_response = await read_with_gemini(gemini_context_list)
 
     output_dict = {
         "articles": [article for article in full_articles],
         "gemini_response": gemini_response,
+        "context_tokens": context_tokens,
     }
 
     return output_dict
 
 
+async def _article_chunks_context(query, embedding_model, db, ef_search, probes):
+    """
+    Retrieves the top-5 chunks for a query and returns the Gemini context built
+    from them along with their source articles.
+    """
+    # Generate a single embedding vector for the query (cached across requests).
+    logger.info(f"Embedding query: {query}")
+    query_vector = await embed_query(query, embedding_model)
+
+    # The query is now a list of floats, which is the expected format for pgvector.
+    # Optionally widen/narrow the ANN search for this request (recall vs latency)
+    await set_vector_search_params_async(db, ef_search=ef_search, probes=probes)
+    relevant_chunks = (
+        await db.scalars(
+            select(models.Chunk)
+            .options(joinedload(models.Chunk.article))
+            .order_by(models.Chunk.embedding.cosine_distance(query_vector))
+            .limit(5)
+        )
+    ).all()
+
+    gemini_context_list = []
+    for article in relevant_chunks:
+        combined_context = f"Article Title: {article.article.title}\n"
+        combined_context += f"Article Text: {article.content}\n\n"
+        gemini_context_list.append(combined_context)
+
+    # Convert the SQLAlchemy objects to Pydantic models for the response
+    article_pydantic_list = [
+        schemas.ArticleRagRead.model_validate(chunk.article)
+        for chunk in relevant_chunks
+    ]
+    return gemini_context_list, article_pydantic_list
+
+
 @rag_router.post(
     "/rag-response-article-chunks/",
     # response_model=list[schemas.ChunkReadWithArticleInfo],
@@ -257,35 +314,20 @@ async def rag_response_full_articles(
 async def rag_response_article_chunks(
     embedding_model: Annotated[SentenceTransformer, Depends(get_embeddings_model)],
     settings: Annotated[Settings, Depends(get_settings)],
-    db: Annotated[Session, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
     query: str = "stock",
+    ef_search: Annotated[int | None, Query(ge=1, le=1000)] = None,
+    probes: Annotated[int | None, Query(ge=1)] = None,
 ):
     if not query or len(query.strip()) == 0:
         return []
 
-    # Generate a single embedding vector for the query.
-    # The output is a numpy array.
-    logger.info(f"Embedding query: {query}")
-    query_vector = embedding_model.encode(query, convert_to_tensor=False).tolist()
-
-    # The query is now a list of floats, which is the expected format for pgvector.
-    # Correctly use the l2_distance method with a single vector.
-    relevant_chunks = db.scalars(
-        select(models.Chunk)
-        .options(joinedload(models.Chunk.article))
-        .order_by(models.Chunk.embedding.cosine_distance(query_vector))
-        .limit(5)
-    ).all()
-
-    gemini_context_list = []
-    for article in relevant_chunks:
-        combined_context = f"Article Title: {article.article.title}\n"
-        combined_context += f"Article Text: {article.content}\n\n"
-        gemini_context_list.append(combined_context)
+    gemini_context_list, article_pydantic_list = await _article_chunks_context(
+        query, embedding_model, db, ef_search, probes
+    )
 
-    # settings.GEMINI_API_KEY: str
     try:
-        gemini_response = read_with_gemini(gemini_context_list, settings.GEMINI_API_KEY)
+        gemini_response = await read_with_gemini(gemini_context_list)
         if not gemini_response:
             raise Exception("no response")
     except Exception as e:
@@ -294,13 +336,55 @@ async def rag_response_article_chunks(
             detail=f"An unexpected error occurred: {e}",
         )
 
-    # Convert the SQLAlchemy objects to Pydantic models for the response
-    article_pydantic_list = [
-        schemas.ArticleRagRead.model_validate(chunk.article)
-        for chunk in relevant_chunks
-    ]
-
     # Return the final structured response using the Pydantic schema
     return schemas.RagResponse(
         gemini_response=gemini_response, articles=article_pydantic_list
     )
+
+
+@rag_router.post("/rag-response-article-chunks-stream/")
+async def rag_response_article_chunks_stream(
+    embedding_model: Annotated[SentenceTransformer, Depends(get_embeddings_model)],
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    query: str = "stock",
+    ef_search: Annotated[int | None, Query(ge=1, le=1000)] = None,
+    probes: Annotated[int | None, Query(ge=1)] = None,
+):
+    """
+    Streaming rag-response-article-chunks, as server-sent events: "metadata"
+    with the source articles as soon as retrieval is done, a "token" event per
+    piece of the Gemini answer as it is generated, then "done" (or "error").
+    """
+    if not query or len(query.strip()) == 0:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Empty query")
+
+    gemini_context_list, article_pydantic_list = await _article_chunks_context(
+        query, embedding_model, db, ef_search, probes
+    )
+
+    async def events():
+        yield sse_event(
+            "metadata",
+            {"articles": [article.model_dump(mode="json") for article in article_pydantic_list]},
+        )
+        async for piece in read_with_gemini_stream(gemini_context_list):
+            yield sse_event("token", {"text": piece})
+        yield sse_event("done", {})
+
+    return sse_response(events())
+
+
+@rag_router.get("/embedding-cache-stats/")
+async def embedding_cache_stats():
+    """
+    Hit / miss / eviction counters for the shared query embedding cache.
+    """
+    return get_query_embedding_cache().stats()
+
+
+@rag_router.get("/gemini-cache-stats/")
+async def gemini_cache_stats():
+    """
+    Hit / miss counters for the Gemini response cache.
+    """
+    return get_gemini_response_cache().stats()
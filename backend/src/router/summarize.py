@@ -1,14 +1,15 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from src.utils.summarization import (
-    summarize_nlp, summarize_generate
+    summarize_nlp, summarize_generate, summarize_generate_stream, SUMMARY_METHODS
 )
 from src.utils.bias_detection import (
     NewsScrape,
 )
-from src.config.config import get_settings
+from src.utils.sse import sse_event, sse_response
 
 from typing import Optional, Dict
+import asyncio
 import json
 
 # Initialize router
@@ -19,9 +20,10 @@ class SummaryURL(BaseModel):
     url: Optional[str] = None
     sentences: Optional[int] = None
     query: Optional[str] = None
+    method: Optional[str] = "frequency"  # Extractive scoring for /analyze: "frequency" or "textrank"
 
 @summarize_router.post("/analyze")
-def summarize_article(input: SummaryURL):
+async def summarize_article(input: SummaryURL):
 
     # Step 0: Initialize
     url = input.url or None
@@ -32,10 +34,12 @@ def summarize_article(input: SummaryURL):
        print("Bad URL or bad num_sentences")
        return None
 
-    # Step 2: Scrape and summarize
-    article = NewsScrape(url)
+    # Step 2: Scrape (awaited on the event loop) and summarize (blocking, so run on a worker thread)
+    article = await NewsScrape(url)
     text = article['text']
-    summary = summarize_nlp(text, sentences)
+    if input.method not in SUMMARY_METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown summary method: {input.method}")
+    summary = await asyncio.to_thread(summarize_nlp, text, sentences, input.method)
 
     # Step 3: Return response ['title', 'authors', 'publish_date', 'text', 'source']
     response = {
@@ -52,7 +56,7 @@ def summarize_article(input: SummaryURL):
     return response
 
 @summarize_router.post("/generate")
-def generate_summary(input: SummaryURL):
+async def generate_summary(input: SummaryURL):
 
     # Step 0: Initialize
     url = input.url or None
@@ -64,10 +68,9 @@ def generate_summary(input: SummaryURL):
         return None
 
     # Step 2: Scrape and summarize
-    settings = get_settings()
-    article = NewsScrape(url)
+    article = await NewsScrape(url)
     text = article['text']
-    summary = summarize_generate(text, sentences, settings.GEMINI_API_KEY)
+    summary = await summarize_generate(text, sentences)
 
     # Step 3: Return response
     response = {
@@ -81,4 +84,44 @@ def generate_summary(input: SummaryURL):
         }
     }
     print("Debug:\n", json.dumps(response, indent=2, default=str))
-    return response
\ No newline at end of file
+    return response
+
+@summarize_router.post("/generate-stream")
+async def generate_summary_stream(input: SummaryURL):
+    """
+    Streaming /generate, as server-sent events: "metadata" with the article
+    details once it is scraped, "token" events with the Gemini summary as it is
+    generated, then "done" with the final summary sentences (or "error").
+    """
+
+    # Step 0: Initialize
+    url = input.url or None
+    sentences = input.sentences or None
+
+    # Step 1: Ensure correct usage
+    if not (url and sentences):
+        raise HTTPException(status_code=400, detail="Bad URL or bad num_sentences")
+
+    # Step 2: Scrape
+    article = await NewsScrape(url)
+    if not article:
+        raise HTTPException(status_code=400, detail="Failed to scrape article or extract text.")
+
+    # Step 3: Stream the summary
+    async def events():
+        yield sse_event("metadata", {
+            "title": article['title'],
+            "authors": article['authors'],
+            "publish_date": article['publish_date'],
+            "text": article['text'],
+            "source": article['source'],
+        })
+        pieces = []
+        async for piece in summarize_generate_stream(article['text'], sentences):
+            pieces.append(piece)
+            yield sse_event("token", {"text": piece})
+        # Same formatting & size check as /generate, once the whole summary is in
+        summary = await asyncio.to_thread(summarize_nlp, "".join(pieces), sentences)
+        yield sse_event("done", {"summary": summary})
+
+    return sse_response(events())
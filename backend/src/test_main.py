@@ -3,12 +3,42 @@ httpx
 pytest # should be preinstalled
 """
 
+import asyncio
+import datetime
 import json
 import os
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
+import httpx
+import networkx as nx
+import numpy as np
+import pytest
+import torch
 from fastapi.testclient import TestClient
+from scipy import sparse
+from sqlalchemy import delete, select, update
 
 from app.main import app
+from src.db import models
+from src.db.database import AsyncSessionLocal, async_engine
+from src.utils.bias_detection import is_valid_sentence
+from src.utils.context_builder import build_context, estimate_tokens
+from src.utils.embedding_cache import EmbeddingCache
+from src.utils.gemini import GeminiClient
+from src.utils.gemini_cache import GeminiResponseCache, gemini_cache_key
+from src.utils.ingest import enqueue_ingest_job
+from src.utils.local_models import chunkify, load_embeddings_model
+from src.utils.model_registry import ModelRegistry, model_registry
+from src.utils.news_gateway import NewsApiGateway
+from src.utils.scrape_cache import ScrapeError, get_article, normalize_url, purge_expired as purge_scrape_cache
+from src.utils.scrape_executor import ScrapeExecutor
+from src.utils.scrape_pipeline import ScrapePipeline, get_scrape_pipeline, response_html
+from src.utils.summarization import pagerank, summarize_nlp, summarize_nlp_batch
+from src.utils.vector_index import set_vector_search_params
+from src.utils.watchlist import advance_high_water_mark, next_poll_interval
 
 client = TestClient(app)
 
@@ -28,6 +58,49 @@ def test_env_load():
         "DB_USER",
         "DB_PASSWORD",
         "DB_NAME",
+        "DB_POOL_SIZE",
+        "DB_MAX_OVERFLOW",
+        "VECTOR_INDEX_METHOD",
+        "VECTOR_INDEX_METRICS",
+        "HNSW_M",
+        "HNSW_EF_CONSTRUCTION",
+        "IVFFLAT_LISTS",
+        "EMBEDDING_BACKEND",
+        "EMBEDDING_MODEL_DIR",
+        "EMBEDDING_CACHE_SIZE",
+        "EMBEDDING_CACHE_TTL_SECONDS",
+        "SCRAPE_CACHE_TTL_SECONDS",
+        "SCRAPE_MAX_WORKERS",
+        "SCRAPE_DOMAIN_INITIAL_CONCURRENCY",
+        "SCRAPE_DOMAIN_MAX_CONCURRENCY",
+        "SCRAPE_TIMEOUT_SECONDS",
+        "SCRAPE_TARGET_LATENCY_SECONDS",
+        "SCRAPE_PARSE_PROCESSES",
+        "NEWS_API_BASE_URL",
+        "NEWS_API_CACHE_TTL_SECONDS",
+        "NEWS_API_TIMEOUT_SECONDS",
+        "NEWS_API_DAILY_QUOTA",
+        "NEWS_API_MAX_CONCURRENCY",
+        "NEWS_API_MAX_RETRIES",
+        "NEWS_API_MAX_PAGES",
+        "CHUNK_MAX_TOKENS",
+        "CHUNK_OVERLAP_TOKENS",
+        "INGEST_BATCH_SIZE",
+        "INGEST_MAX_ATTEMPTS",
+        "INGEST_RETRY_BASE_SECONDS",
+        "INGEST_JOB_LEASE_SECONDS",
+        "INGEST_POLL_SECONDS",
+        "WATCHLIST_DEFAULT_INTERVAL_SECONDS",
+        "WATCHLIST_MIN_INTERVAL_SECONDS",
+        "WATCHLIST_MAX_INTERVAL_SECONDS",
+        "WATCHLIST_TARGET_NEW_ARTICLES",
+        "GEMINI_BASE_URL",
+        "GEMINI_MAX_CONCURRENCY",
+        "GEMINI_TIMEOUT_SECONDS",
+        "GEMINI_MAX_RETRIES",
+        "GEMINI_CACHE_TTL_SECONDS",
+        "RAG_CONTEXT_TOKEN_BUDGET",
+        "MODEL_WARMUP",
     ]
     # print(response.json())
     response_keys = set(response.json().keys())
@@ -74,7 +147,619 @@ def test_extraction():
 
 
 def test_read_db():
-    response = client.get("/api/v1/db/read-db")
+    response = client.get("/api/v1/db/read-db-chunks/?limit=2")
     assert response.status_code == 200
     data = response.json()
-    assert type(data) is list
+    assert type(data["items"]) is list
+    assert len(data["items"]) <= 2
+    # Embeddings and content are opt-in
+    for item in data["items"]:
+        assert "embedding" not in item and "content" not in item
+
+    if data["next_cursor"]:
+        next_page = client.get(
+            f"/api/v1/db/read-db-chunks/?limit=2&cursor={data['next_cursor']}"
+        ).json()
+        first_ids = {item["chunk_id"] for item in data["items"]}
+        assert not first_ids & {item["chunk_id"] for item in next_page["items"]}
+
+
+def test_store_query_enqueues_job():
+    run_id = uuid.uuid4().hex
+    url = f"/api/v1/rag/store-query/?query=test-{run_id}"
+    response = client.post(url, headers={"Idempotency-Key": run_id})
+    assert response.status_code == 202
+    job = response.json()
+    assert job["created"] is True
+
+    # Resubmitting with the same key returns the same job
+    again = client.post(url, headers={"Idempotency-Key": run_id}).json()
+    assert (again["job_id"], again["created"]) == (job["job_id"], False)
+
+    status = client.get(f"/api/v1/rag/ingest-jobs/{job['job_id']}").json()
+    assert status["query"] == f"test-{run_id}"
+    assert status["status"] in {"queued", "running", "succeeded", "failed"}
+    assert set(status["articles"]) == {"pending", "scraped", "embedded", "stored", "skipped", "failed"}
+    assert client.get(f"/api/v1/rag/ingest-jobs/{uuid.uuid4()}").status_code == 404
+
+    # The query is kept as submitted (NewsAPI's AND / OR / NOT are case sensitive),
+    # but the same query in another case or spacing shares the queued job
+    query = f"Test-{run_id} AND climate"
+    first = client.post("/api/v1/rag/store-query/", params={"query": query}).json()
+    second = client.post("/api/v1/rag/store-query/", params={"query": f" test-{run_id}  and CLIMATE"}).json()
+    assert (second["job_id"], second["created"]) == (first["job_id"], False)
+    assert client.get(f"/api/v1/rag/ingest-jobs/{first['job_id']}").json()["query"] == query
+
+
+def test_watchlist_crud():
+    query = f"Watch-{uuid.uuid4().hex} AND markets"  # Kept as submitted, for NewsAPI's operators
+    response = client.post("/api/v1/rag/watchlist/", json={"query": query, "poll_interval_seconds": 1800})
+    assert response.status_code == 201
+    topic = response.json()
+    assert (topic["query"], topic["enabled"], topic["last_published_at"]) == (query, True, None)
+    assert client.post("/api/v1/rag/watchlist/", json={"query": query.upper()}).status_code == 409
+
+    url = f"/api/v1/rag/watchlist/{topic['topic_id']}"
+    assert client.patch(url, json={"enabled": False}).json()["enabled"] is False
+    assert topic["topic_id"] in {item["topic_id"] for item in client.get("/api/v1/rag/watchlist/").json()}
+    assert client.delete(url).status_code == 204
+    assert client.get(url).status_code == 404
+
+
+def test_watchlist_polls_dont_share_ad_hoc_jobs():
+    query = f"Shared-{uuid.uuid4().hex}"
+    topic = client.post("/api/v1/rag/watchlist/", json={"query": query}).json()
+    ad_hoc = client.post("/api/v1/rag/store-query/", params={"query": query}).json()
+    since = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+
+    async def poll():
+        await async_engine.dispose(close=False)  # Pooled connections belong to earlier event loops
+        async with AsyncSessionLocal() as db:
+            job, created = await enqueue_ingest_job(
+                db, query, from_date=since, sort_by="publishedAt", topic_id=uuid.UUID(topic["topic_id"])
+            )
+            return str(job.job_id), created
+
+    # A topic poll gets its own job (and the ad-hoc job keeps its full window), but shares a repeated poll
+    poll_id, created = asyncio.run(poll())
+    assert created and poll_id != ad_hoc["job_id"]
+    assert asyncio.run(poll()) == (poll_id, False)
+    assert client.post("/api/v1/rag/store-query/", params={"query": query}).json()["job_id"] == ad_hoc["job_id"]
+    assert client.delete(f"/api/v1/rag/watchlist/{topic['topic_id']}").status_code == 204
+
+
+def test_watchlist_poll_interval():
+    # Aims for 20 new articles per poll, changing the interval at most 2x per poll
+    assert next_poll_interval(3600, 40, 20, 900, 86400) == 1800
+    assert next_poll_interval(3600, 0, 20, 900, 86400) == 7200
+    assert next_poll_interval(3600, 15, 20, 900, 86400) == 4800
+    assert next_poll_interval(1000, 100, 20, 900, 86400) == 900
+    assert next_poll_interval(80000, 0, 20, 900, 86400) == 86400
+
+
+def test_watchlist_backfills_truncated_polls():
+    def at(hour):
+        return datetime.datetime(2025, 1, 1, hour, tzinfo=datetime.timezone.utc)
+
+    # A complete poll moves the mark to the newest article
+    assert advance_high_water_mark(at(0), None, None, [at(2), at(3)], False) == (at(3), None, None)
+    # A truncated poll keeps the mark and backfills below its oldest article
+    state = advance_high_water_mark(at(0), None, None, [at(8), at(9)], True)
+    assert state == (at(0), at(8), at(9))
+    state = advance_high_water_mark(*state, [at(5), at(7)], True)
+    assert state == (at(0), at(5), at(9))
+    # Once the backfill is complete, the mark jumps to the newest article seen
+    assert advance_high_water_mark(*state, [at(1), at(4)], False) == (at(9), None, None)
+    # A truncated poll that got no further back doesn't backfill forever
+    assert advance_high_water_mark(*state, [at(5), at(6)], True) == (at(9), None, None)
+
+
+def test_embedding_cache_eviction():
+    cache = EmbeddingCache(maxsize=2, ttl_seconds=60)
+    cache.put("Stock", [1.0])
+    cache.put("election", [2.0])
+    assert cache.get("  stock ") == [1.0]  # normalized key, refreshes recency
+    cache.put("AAPL", [3.0])  # evicts "election", the least recently used
+    assert cache.get("election") is None
+    assert cache.get("aapl") == [3.0]
+
+    expired = EmbeddingCache(maxsize=2, ttl_seconds=0)
+    expired.put("stock", [1.0])
+    assert expired.get("stock") is None
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+
+
+def test_scrape_cache_normalize_url():
+    key = normalize_url("https://www.example.com/news/story/?utm_source=x&b=2&a=1#top")
+    assert key == "https://www.example.com/news/story?a=1&b=2"
+    assert normalize_url("HTTPS://WWW.Example.com:443/news/story") == "https://www.example.com/news/story"
+    # Paths are case-sensitive
+    assert normalize_url("https://example.com/News") != normalize_url("https://example.com/news")
+
+
+def test_scrape_executor_limits_and_deadline():
+    executor = ScrapeExecutor(
+        max_workers=8,
+        domain_initial_concurrency=2,
+        domain_max_concurrency=4,
+        timeout_seconds=0.5,
+        target_latency_seconds=0.2,
+    )
+    running = {"now": 0, "peak": 0}
+
+    async def scrape(url, timeout):
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        try:
+            await asyncio.sleep(1.0 if "slow" in url else 0.05)
+        finally:
+            running["now"] -= 1
+        return url
+
+    async def main():
+        fast = await asyncio.gather(*(executor.run(scrape, f"https://fast.example/{i}") for i in range(8)))
+        with pytest.raises(asyncio.TimeoutError):
+            await executor.run(scrape, "https://slow.example/story")
+        return fast
+
+    assert len(asyncio.run(main())) == 8
+    assert running["peak"] <= 4  # Per-domain limit, growing from 2 towards 4 on fast scrapes
+    stats = executor.stats()["domains"]
+    assert stats["fast.example"]["successes"] == 8 and stats["fast.example"]["limit"] > 2
+    # The straggler is cancelled at its deadline and counted as an error
+    assert stats["slow.example"]["timeouts"] == 1 and stats["slow.example"]["errors"] == 1
+    assert running["now"] == 0 and executor.stats()["in_flight"] == 0
+
+
+def test_scrape_executor_busy_domain_does_not_block_others():
+    executor = ScrapeExecutor(max_workers=2, domain_initial_concurrency=1, timeout_seconds=5)
+    finished = []
+
+    async def scrape(url, timeout):
+        await asyncio.sleep(0.3 if "busy" in url else 0.01)
+        finished.append(url)
+        return url
+
+    async def main():
+        busy = [asyncio.create_task(executor.run(scrape, f"https://busy.example/{i}")) for i in range(4)]
+        await asyncio.sleep(0)  # The busy scrapes queue on their domain first
+        await executor.run(scrape, "https://other.example/story")
+        await asyncio.gather(*busy)
+
+    asyncio.run(main())
+    # Only one busy scrape holds a global slot, so the other domain gets the second one straight away
+    assert finished[0] == "https://other.example/story"
+    assert executor.stats()["in_flight"] == 0
+
+
+def test_news_scrape_sentence_filter():
+    assert is_valid_sentence("  The council approved the new budget for the coming year.  ")
+    assert not is_valid_sentence("Too short to keep.")
+    assert not is_valid_sentence("Read the full story at https://example.com/story today.")
+    assert not is_valid_sentence("Click HERE to get our daily newsletter in your inbox.")
+
+
+class ArticlePageStub(BaseHTTPRequestHandler):
+    """
+    Serves the same article page on every path, without a charset in its Content-Type.
+    """
+
+    body = (
+        "<html><head><title>Stub article</title></head><body><article>"
+        + "<p>The council said that the new bridge over the river is expected to open in the spring.</p>" * 20
+        + "</article></body></html>"
+    ).encode()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_scrape_pipeline_fetch_and_parse():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ArticlePageStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    pipeline = ScrapePipeline(parse_processes=1)
+    url = f"http://127.0.0.1:{server.server_address[1]}/story"
+
+    async def main():
+        try:
+            response = await pipeline.fetch(url, {}, timeout=5)
+            return await pipeline.parse(url, response_html(response))
+        finally:
+            await pipeline.aclose()
+
+    try:
+        page = asyncio.run(main())
+        assert page["title"] == "Stub article"
+        assert page["text"].startswith("The council said")
+    finally:
+        server.shutdown()
+
+
+class TooManyRequestsStub(BaseHTTPRequestHandler):
+    """
+    Throttles every request with HTTP 429.
+    """
+
+    def do_GET(self):
+        self.send_response(429)
+        self.send_header("Retry-After", "1")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def test_scrape_executor_halves_limit_on_429():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TooManyRequestsStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    executor = ScrapeExecutor(domain_initial_concurrency=4, domain_max_concurrency=8)
+    url = f"http://127.0.0.1:{server.server_address[1]}/throttled-{uuid.uuid4().hex}"
+
+    async def main():
+        await async_engine.dispose(close=False)  # Pooled connections belong to earlier event loops
+        try:
+            with pytest.raises(ScrapeError) as error:
+                await executor.run(get_article, url)
+            assert error.value.status_code == 429 and error.value.page is None
+        finally:
+            await get_scrape_pipeline().aclose()
+
+    try:
+        asyncio.run(main())
+    finally:
+        server.shutdown()
+    stats = executor.stats()["domains"]["127.0.0.1"]
+    assert stats["limit"] == 2 and stats["errors"] == 1 and stats["successes"] == 0
+
+
+class GeminiStub(BaseHTTPRequestHandler):
+    """
+    Stands in for the Gemini generateContent / streamGenerateContent endpoints:
+    answers with the queued status codes first, then with a canned response
+    after `delay` seconds.
+    """
+
+    statuses = []
+    delay = 0
+    requests = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        GeminiStub.requests += 1
+        status = GeminiStub.statuses.pop(0) if GeminiStub.statuses else 200
+        time.sleep(GeminiStub.delay)
+        if status == 200 and "streamGenerateContent" in self.path:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for piece in ["stub ", "answer"]:
+                event = {"candidates": [{"content": {"role": "model", "parts": [{"text": piece}]}}]}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode())
+            return
+        if status == 200:
+            body = {"candidates": [{"content": {"role": "model", "parts": [{"text": "stub answer"}]}}]}
+        else:
+            body = {"error": {"code": status, "message": "stub error", "status": "UNAVAILABLE"}}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_gemini_client_against_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GeminiStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        # 429 and 503 are retried
+        GeminiStub.statuses = [429, 503]
+        gemini_client = GeminiClient("test", base_url, max_retries=2, retry_initial_delay=0.01)
+        assert asyncio.run(gemini_client.generate("prompt", "instruction")) == "stub answer"
+        assert GeminiStub.requests == 3
+
+        # Streaming yields the pieces as they arrive
+        async def collect_stream():
+            return [piece async for piece in gemini_client.generate_stream("prompt", "instruction")]
+
+        assert asyncio.run(collect_stream()) == ["stub ", "answer"]
+
+        # Other client errors are not
+        GeminiStub.statuses = [400]
+        with pytest.raises(Exception):
+            asyncio.run(gemini_client.generate("prompt", "instruction"))
+        assert GeminiStub.requests == 5
+
+        # The deadline covers the whole call
+        GeminiStub.delay = 1
+        slow_client = GeminiClient("test", base_url, timeout_seconds=0.2)
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(slow_client.generate("prompt", "instruction"))
+    finally:
+        GeminiStub.delay = 0
+        server.shutdown()
+
+
+class NewsApiStub(BaseHTTPRequestHandler):
+    """
+    Stands in for the NewsAPI /everything endpoint: answers with the queued
+    status codes first, then after `delay` seconds with the requested page
+    of `total_results` results.
+    """
+
+    statuses = []
+    delay = 0
+    total_results = 1
+    requests = 0
+
+    def do_GET(self):
+        NewsApiStub.requests += 1
+        status = NewsApiStub.statuses.pop(0) if NewsApiStub.statuses else 200
+        time.sleep(NewsApiStub.delay)
+        query = dict(pair.split("=") for pair in self.path.split("?")[1].split("&"))
+        if status == 200:
+            body = {
+                "status": "ok",
+                "totalResults": NewsApiStub.total_results,
+                "articles": [{"page": query["page"]}],
+            }
+        else:
+            body = {"status": "error", "code": "rateLimited", "message": "stub error"}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if status == 429:
+            self.send_header("Retry-After", "0.1")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_news_gateway_cache_and_coalescing():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), NewsApiStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    gateway = NewsApiGateway("test", base_url, ttl_seconds=60, max_retries=0)
+    try:
+        # Concurrent identical requests make one upstream call
+        NewsApiStub.delay = 0.2
+
+        async def concurrent_gets():
+            return await asyncio.gather(*[gateway.get("everything", "stock") for _ in range(5)])
+
+        results = asyncio.run(concurrent_gets())
+        assert NewsApiStub.requests == 1
+        assert all(result == results[0] for result in results)
+
+        # Then it is served from the cache, but another page is another call
+        NewsApiStub.delay = 0
+        assert asyncio.run(gateway.get("everything", "stock")) == results[0]
+        assert asyncio.run(gateway.get("everything", "stock", page=2))["articles"] == [{"page": "2"}]
+        assert NewsApiStub.requests == 2
+
+        # Errors raise for the caller and are not cached
+        NewsApiStub.statuses = [429, 429]
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(gateway.get("everything", "bonds"))
+        with pytest.raises(httpx.HTTPStatusError):
+            asyncio.run(gateway.get("everything", "bonds"))
+
+        stats = gateway.stats()
+        assert (stats["requests_today"], stats["coalesced"], stats["hits"]) == (4, 4, 1)
+        assert stats["quota_remaining"] == 96
+
+        # Paged fetch: totalResults decides the page count (capped by max_pages),
+        # and a 429 is retried after its Retry-After delay
+        NewsApiStub.requests = 0
+        NewsApiStub.total_results = 250
+        NewsApiStub.statuses = [429]
+        paging_gateway = NewsApiGateway("test", base_url, retry_initial_delay=0.01)
+
+        async def collect_pages(max_pages):
+            return [page async for page in paging_gateway.get_pages("everything", "rates", max_pages=max_pages)]
+
+        pages = asyncio.run(collect_pages(max_pages=5))
+        assert sorted(page["articles"][0]["page"] for page in pages) == ["1", "2", "3"]
+        assert NewsApiStub.requests == 4
+        paging_gateway.clear()
+        assert len(asyncio.run(collect_pages(max_pages=2))) == 2
+    finally:
+        NewsApiStub.statuses = []
+        NewsApiStub.delay = 0
+        NewsApiStub.total_results = 1
+        server.shutdown()
+
+
+def test_vector_search_params_rejected_below_one():
+    for params in ({"ef_search": 0}, {"probes": -1}):
+        with pytest.raises(ValueError):
+            set_vector_search_params(None, **params)  # Rejected before the session is touched
+
+
+def test_gemini_cache_key():
+    key = gemini_cache_key("model", "instruction", "prompt", ["chunk a", "chunk b"])
+    assert key == gemini_cache_key("model", "instruction", "prompt", ["chunk a", "chunk b"])
+    # Any change to the model, prompt, a chunk or the chunk order is a different answer
+    assert key != gemini_cache_key("other", "instruction", "prompt", ["chunk a", "chunk b"])
+    assert key != gemini_cache_key("model", "instruction", "prompt", ["chunk a", "chunk c"])
+    assert key != gemini_cache_key("model", "instruction", "prompt", ["chunk b", "chunk a"])
+
+
+def test_gemini_cache_purge():
+    cache = GeminiResponseCache(ttl_seconds=60)
+    fresh, stale = f"test-fresh-{uuid.uuid4()}", f"test-stale-{uuid.uuid4()}"
+    cache_key = models.GeminiResponse.cache_key
+
+    async def purge():
+        await async_engine.dispose(close=False)  # Pooled connections belong to earlier event loops
+        await cache.put(fresh, "model", "fresh answer")
+        await cache.put(stale, "model", "stale answer")
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(models.GeminiResponse)
+                .where(cache_key == stale)
+                .values(created_at=models.GeminiResponse.created_at - datetime.timedelta(seconds=120))
+            )
+            await db.commit()
+        purged = await cache.purge_expired()
+        async with AsyncSessionLocal() as db:
+            remaining = set(await db.scalars(select(cache_key).where(cache_key.in_([fresh, stale]))))
+            await db.execute(delete(models.GeminiResponse).where(cache_key == fresh))
+            await db.commit()
+        return purged, remaining
+
+    purged, remaining = asyncio.run(purge())
+    # Only the expired entry is deleted (along with any other expired rows in the table)
+    assert remaining == {fresh}
+    assert purged >= 1 and cache.stats()["purged"] == purged
+
+
+def test_scrape_cache_purge():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    fresh, old = f"https://test.example/fresh-{uuid.uuid4()}", f"https://test.example/old-{uuid.uuid4()}"
+    page_url = models.ScrapedPage.url
+
+    async def purge():
+        await async_engine.dispose(close=False)  # Pooled connections belong to earlier event loops
+        async with AsyncSessionLocal() as db:
+            db.add(models.ScrapedPage(url=fresh, text="fresh page", fetched_at=now))
+            db.add(models.ScrapedPage(url=old, text="old page", fetched_at=now - datetime.timedelta(days=30)))
+            await db.commit()
+        purged = await purge_scrape_cache(retention_seconds=86400)
+        async with AsyncSessionLocal() as db:
+            remaining = set(await db.scalars(select(page_url).where(page_url.in_([fresh, old]))))
+            await db.execute(delete(models.ScrapedPage).where(page_url == fresh))
+            await db.commit()
+        return purged, remaining
+
+    purged, remaining = asyncio.run(purge())
+    # Only the page past the retention is deleted (along with any other old rows in the table)
+    assert remaining == {fresh}
+    assert purged >= 1
+
+
+def test_context_builder_budget():
+    with open(os.path.join("src", "test_suite_responses.json")) as f:
+        text = json.load(f)["test_extraction"]["test_text"]
+    passages = [
+        {"title": "Far", "text": "Short unrelated story.", "embedding": [0.0, 1.0]},
+        {"title": "Close", "text": text, "embedding": [1.0, 0.1]},
+        {"title": "Syndicated copy", "text": text, "embedding": [1.0, 0.11]},
+    ]
+    blocks, used, tokens = build_context(passages, [1.0, 0.0], budget_tokens=200)
+    # Ranked by similarity, with the near-duplicate dropped and the long article compressed
+    assert used == [1, 0]
+    assert blocks[0].startswith("Article Title: Close")
+    assert tokens == sum(estimate_tokens(block) for block in blocks) <= 200
+
+
+def test_summarize_nlp_batch_matches_single():
+    with open(os.path.join("src", "test_suite_responses.json")) as f:
+        text = json.load(f)["test_extraction"]["test_text"]
+    texts = [text, text[: len(text) // 2]]
+    assert summarize_nlp_batch(texts, 3) == [summarize_nlp(t, 3) for t in texts]
+    assert len(summarize_nlp(text, 3)) == 3
+    assert len(summarize_nlp(text, 3, method="textrank")) == 3
+    assert summarize_nlp("", 3) == []
+
+
+def test_textrank_pagerank_matches_networkx():
+    graph = sparse.random(200, 200, density=0.005, random_state=0, format="csr")
+    graph = graph.maximum(graph.T)  # Symmetric, with some isolated (dangling) sentences
+    expected = nx.pagerank(nx.from_scipy_sparse_array(graph))
+    assert np.allclose(pagerank(graph), [expected[i] for i in range(200)], atol=1e-6)
+
+
+def test_model_registry_loads_once():
+    registry = ModelRegistry()
+    loads = []
+    registry.register("counter", lambda: loads.append(1) or len(loads))
+    registry.register("broken", lambda: 1 / 0)
+    assert not registry.is_ready()
+
+    registry.warm_up()
+    assert registry.get("counter") == 1 and loads == [1]
+    status = registry.status()
+    assert status["counter"]["state"] == "ready"
+    assert status["broken"]["state"] == "failed"
+    assert not registry.is_ready()
+
+
+def test_bias_batch_predict_parity():
+    bias_detector = model_registry.get("bias_detector")
+    sentences = [
+        "The senator said the new tax bill would hurt working families.",
+        "Stocks rose.",
+        "Critics argue the administration's border policy has failed to address the root causes of migration.",
+        "The governor signed the budget on Tuesday.",
+    ]
+    single = [bias_detector.text_predict(s)["probability"] for s in sentences]
+    batched = bias_detector.batch_predict(sentences, batch_size=3)
+    assert [p["text"] for p in batched] == sentences
+    assert np.allclose(single, [p["probability"] for p in batched], atol=1e-5)
+
+
+def test_claim_embeddings_parity():
+    sentences = [
+        "The senator said the new tax bill would hurt working families.",
+        "Stocks rose.",
+        "The governor signed the budget on Tuesday after weeks of negotiation.",
+    ]
+    sentence_detector = model_registry.get("sentence_detector")
+    batched = sentence_detector.get_embeddings(sentences, batch_size=2)
+    assert batched.shape == (len(sentences), sentence_detector.model.config.hidden_size)
+    # Same features as the previous Dataset.map implementation (every sentence padded
+    # to the longest, then encoded 10 at a time), whatever the batching
+    tokens = sentence_detector.tokenizer(sentences, padding=True, truncation=True, return_tensors="pt")
+    with torch.inference_mode():
+        reference = np.vstack([
+            sentence_detector.model(
+                input_ids=tokens["input_ids"][i : i + 10].to(sentence_detector.device),
+                attention_mask=tokens["attention_mask"][i : i + 10].to(sentence_detector.device),
+            ).last_hidden_state[:, 0].cpu().numpy()
+            for i in range(0, len(sentences), 10)
+        ])
+    assert np.allclose(batched, reference, atol=1e-4)
+    # Padding within a batch must not change a sentence's [CLS] features
+    for sentence, features in zip(sentences, batched):
+        unpadded = sentence_detector.get_embeddings([sentence], batch_size=1)[0]
+        assert np.allclose(features, unpadded, atol=1e-4)
+
+
+def test_chunkify_fits_embedding_model():
+    model = model_registry.get("embeddings")
+    text = " ".join(f"Sentence {i} is about the city council and its budget vote." for i in range(100))
+    chunks = list(chunkify(text, model, overlap_tokens=32))
+    assert len(chunks) > 1
+    for chunk, start, end in chunks:
+        assert text[start:end] == chunk
+        assert chunk.endswith(".")  # Whole sentences
+        assert len(model.tokenizer(chunk)["input_ids"]) <= model.max_seq_length
+    # Each chunk starts inside the previous one (the overlap) and the last one ends the text
+    assert all(chunks[i + 1][1] < chunks[i][2] for i in range(len(chunks) - 1))
+    assert chunks[-1][2] == len(text)
+
+
+def test_embedding_backend_settings():
+    with pytest.raises(ValueError, match="Unknown EMBEDDING_BACKEND"):
+        load_embeddings_model("tflite")
+    # The ONNX backends only load from an exported local folder
+    with pytest.raises(ValueError, match="EMBEDDING_MODEL_DIR"):
+        load_embeddings_model("onnx-int8", "")
@@ -1,5 +1,5 @@
 # -------------------- Import requirements ------------------------------------------------------------------------------------------------------------------------ #
-# !pip install thefuzz[speedup] transformers datasets torch nltk pandas numpy scipy scikit-learn
+# !pip install thefuzz[speedup] transformers torch nltk pandas numpy scipy scikit-learn
 
 # Source checker + Transformers reqs
 import numpy as np
@@ -10,29 +10,41 @@ import os.path as op
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
 import torch
 import torch.nn.functional as F
-from datasets import Dataset
-from datasets.utils.logging import disable_progress_bar
 import torch
 from transformers import AutoTokenizer
 from transformers import AutoModel
-import nltk
-nltk.download('punkt_tab')
 import pickle
 from scipy.special import expit
 import sklearn
 
 # Extras
 from thefuzz import process
-from newspaper import Article
 import re
 from urllib.parse import urlparse
 from functools import reduce
 import math
-from datasets.utils.logging import disable_progress_bar, set_verbosity_error
-disable_progress_bar()
-set_verbosity_error()
+import asyncio
+from src.utils.local_models import split_sentences
+from src.utils.scrape_cache import ScrapeError, get_article
 id2label = {0: "left", 1: "center", 2: "right"}
 
+# Sentence filters for NewsScrape, compiled once
+URL_PATTERN = re.compile(r'http[s]?://')
+BOILERPLATE_PATTERN = re.compile(r'\bsubscribe\b|\bread more\b|\bclick here\b', re.IGNORECASE)
+MIN_SENTENCE_LENGTH = 30
+
+# -------------------- Helper functions -------------------------------------------------------------------------------------------------------------------------- #
+def length_bucketed_batches(tokenizer, texts, batch_size, device): # Yields (indices, model inputs) for batches of texts with similar token lengths
+  # Tokenize once without padding, then each batch is only padded to its own longest text
+  encodings = tokenizer(texts, truncation=True)
+  order = np.argsort([len(ids) for ids in encodings["input_ids"]], kind="stable")
+  for start in range(0, len(order), batch_size):
+    batch_ids = order[start:start + batch_size]
+    batch = tokenizer.pad({"input_ids": [encodings["input_ids"][i] for i in batch_ids],
+                           "attention_mask": [encodings["attention_mask"][i] for i in batch_ids]},
+                          return_tensors="pt")
+    yield batch_ids, {key: value.to(device) for key, value in batch.items()}
+
 # -------------------- Class definitions ------------------------------------------------------------------------------------------------------------------------- #
 class SourceChecker():
   def __init__(self, df_path: str): # Loads in a dataframe with columns: "source", "P(left|source)", "P(center|source)", and "P(right|source)"
@@ -55,7 +67,8 @@ class SourceChecker():
     return match, dist
 
 class SentenceClaimDetector():
-  def __init__(self, pkl_path: str): # Loads in OneClassSVM model along with DistilBERT
+  def __init__(self, pkl_path: str, batch_size=32): # Loads in OneClassSVM model along with DistilBERT
+    self.batch_size = batch_size
     with open(pkl_path, 'rb') as f:
       self.classifier = pickle.load(f)
     self.device = torch.device("cuda:0" if torch.cuda.is_available() else "cpu")
@@ -64,17 +77,13 @@ class SentenceClaimDetector():
     self.model.to(self.device);
     print("Model has been successfully loaded!")
   def split_sentences(self, article: str): # Splits sentences using nltk
-    return nltk.sent_tokenize(article)
-  def get_embeddings(self, sentences: list[str]): # Gets embeddings for a given list of sentences
-    raw_sentences = Dataset.from_list([{"text": s} for s in sentences])
-    tokenized_sentences = raw_sentences.map(lambda x: self.tokenizer(x["text"], padding=True, truncation=True), batched=True)
-    @torch.inference_mode()
-    def get_output_embeddings(batch):
-        input_ids = torch.tensor(batch["input_ids"]).to(self.device)
-        attention_mask = torch.tensor(batch["attention_mask"]).to(self.device)
-        output = self.model(input_ids, attention_mask=attention_mask).last_hidden_state[:, 0]
-        return {"features": output.cpu().numpy()}
-    return tokenized_sentences.map(get_output_embeddings, batched=True, batch_size=10)
+    return split_sentences(article)
+  def get_embeddings(self, sentences: list[str], batch_size=None): # Gets [CLS] embeddings for a list of sentences as one (n_sentences, hidden_size) matrix
+    features = np.empty((len(sentences), self.model.config.hidden_size), dtype=np.float32)
+    with torch.inference_mode():
+      for batch_ids, batch in length_bucketed_batches(self.tokenizer, sentences, batch_size or self.batch_size, self.device):
+        features[batch_ids] = self.model(**batch).last_hidden_state[:, 0].cpu().numpy()
+    return features
   def embedding_predict(self, sentences, embeddings): # Given an embedding, predicts whether or not it is a claim
     X = embeddings
     predictions = self.classifier.predict(X)
@@ -88,11 +97,13 @@ class SentenceClaimDetector():
                      "class_id": prediction,
                      "label": predicted_label})
     return output
-  def text_predict(self, article: str, claim_threshold=0): # Splits text into sentences. Tokenizes those sentences. Grabs embeddings. Predicts.
+  def text_predict(self, article: str, claim_threshold=0, sentences=None): # Splits text into sentences (unless they are given already split). Tokenizes those sentences. Grabs embeddings. Predicts.
     self.claim_threshold = claim_threshold
-    sentences = self.split_sentences(article)
-    sentence_features = self.get_embeddings(sentences)
-    return self.embedding_predict(sentences, np.array(sentence_features['features']))
+    if sentences is None:
+      sentences = self.split_sentences(article)
+    if not sentences:
+      return []
+    return self.embedding_predict(sentences, self.get_embeddings(sentences))
 
 class BiasDetector():
   def __init__(self, checkpoint_path): # Loads the fine-tuned checkpoint along with DistilBERT
@@ -108,7 +119,20 @@ class BiasDetector():
     with torch.no_grad():
         outputs = self.model(**tokenized_input)
     logits = outputs.logits
-    probs = F.softmax(logits, dim=-1).numpy().flatten()
+    probs = F.softmax(logits, dim=-1).cpu().numpy().flatten()
+    return self.format_prediction(text, probs, thresholds)
+  def batch_predict(self, texts: list[str], batch_size=32, thresholds={"left": 0.0, "right": 0.0, "center": 0.0}): # text_predict for many texts at once, in the same order
+    if not texts:
+      return []
+    outputs = [None] * len(texts)
+    for batch_ids, batch in length_bucketed_batches(self.tokenizer, texts, batch_size, self.device):
+      with torch.inference_mode():
+        logits = self.model(**batch).logits
+      batch_probs = F.softmax(logits, dim=-1).cpu().numpy()
+      for i, probs in zip(batch_ids, batch_probs):
+        outputs[i] = self.format_prediction(texts[i], probs, thresholds)
+    return outputs
+  def format_prediction(self, text, probs, thresholds): # Helper function for text_predict and batch_predict
     predicted_class_id = np.argmax(probs, axis=0)
     predicted_label = id2label[predicted_class_id] if probs[predicted_class_id] >= thresholds[id2label[predicted_class_id]] else "center"
     return {"text": text,
@@ -128,27 +152,29 @@ def BaseURL(url):
         base = domain_parts[0]
     return base
 
-def NewsScrape(url): # Webscrapes the URL and filters for the article
+def is_valid_sentence(s): # Drops short sentences, URLs and common boilerplate ("subscribe", "read more", "click here")
+  s = s.strip()
+  return len(s) >= MIN_SENTENCE_LENGTH and not URL_PATTERN.search(s) and not BOILERPLATE_PATTERN.search(s)
+
+def clean_sentences(text): # Splits article text into sentences and keeps the valid ones
+  return [s for s in split_sentences(text) if is_valid_sentence(s)]
+
+async def NewsScrape(url): # Webscrapes the URL (through the shared scrape cache) and filters for the article. Returns the kept sentences too, so later stages don't split the text again
   try:
-    article = Article(url)
-    article.download()
-    article.parse()
-    article.nlp()
-  except:
+    article = await get_article(url)
+  except ScrapeError as e: # Fall back to the stale cached copy, if there is one
+    article = e.page
+  except Exception: # Not bare, so a cancelled request isn't swallowed
+    return None
+  if article is None:
     return None
-  sentences = nltk.sent_tokenize(article.text)
-  def is_valid_sentence(s):
-      s = s.strip()
-      if len(s) < 30: return False  # Too short
-      if re.search(r'http[s]?://', s): return False  # Contains URL
-      if re.search(r'\bsubscribe\b|\bread more\b|\bclick here\b', s, re.IGNORECASE): return False # Other common items
-      return True
-  cleaned_sentences = [s for s in sentences if is_valid_sentence(s)]
+  cleaned_sentences = await asyncio.to_thread(clean_sentences, article["text"])
   cleaned_article = "\n".join(cleaned_sentences)
-  return {"title": article.title,
-          "authors": article.authors,
-          "publish_date": article.publish_date,
+  return {"title": article["title"],
+          "authors": article["authors"],
+          "publish_date": article["publish_date"],
           "text": cleaned_article,
+          "sentences": cleaned_sentences,
           "source": BaseURL(url)}
 
 def NBScore(priors, source_probs, article_probs, sentence_probs, weights=None):
@@ -0,0 +1,87 @@
+"""
+Token-budgeted context assembly for the RAG prompts.
+
+Instead of concatenating every retrieved article in full, passages are ranked by
+similarity to the query, near-duplicates (the same story syndicated by several
+outlets) are dropped, and articles that don't fit their share of the budget are
+compressed with the extractive summarizer before being sent.
+"""
+
+import math
+
+import numpy as np
+
+from src.utils.summarization import summarize_nlp
+
+# Gemini's rule of thumb for English text: about 4 characters per token
+CHARS_PER_TOKEN = 4
+# Passages whose embeddings are at least this similar count as the same story
+NEAR_DUPLICATE_SIMILARITY = 0.95
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _unit(vector) -> np.ndarray:
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _compress(text: str, max_tokens: int) -> str:
+    """
+    Keeps the highest scoring sentences (summarize_nlp's ranking) that fit in max_tokens.
+    """
+    kept = []
+    used = 0
+    for sentence in summarize_nlp(text, len(text)):
+        tokens = estimate_tokens(sentence) + 1
+        if used + tokens > max_tokens:
+            continue
+        kept.append(sentence)
+        used += tokens
+    return " ".join(kept)
+
+
+def build_context(passages: list[dict], query_vector, budget_tokens: int):
+    """
+    Builds the Gemini context from retrieved passages within a token budget.
+
+    Args:
+        passages (list[dict]): Each with a "title", "text" and "embedding"
+            (e.g. an article and the embedding of its best matching chunk).
+        query_vector (list[float]): The query embedding.
+        budget_tokens (int): The maximum (estimated) number of context tokens.
+
+    Returns:
+        tuple[list[str], list[int], int]: The context blocks, the indices of the
+        passages they came from (in rank order), and the estimated token count.
+    """
+    query = _unit(query_vector)
+    units = [_unit(passage["embedding"]) for passage in passages]
+
+    # Rank by similarity to the query, skipping near-duplicates of a better ranked passage
+    selected = []
+    for i in sorted(range(len(passages)), key=lambda i: -float(units[i] @ query)):
+        if all(float(units[i] @ units[j]) < NEAR_DUPLICATE_SIMILARITY for j in selected):
+            selected.append(i)
+
+    # Each passage gets an equal share of what is left, so the budget a short
+    # article doesn't use carries over to the ones after it
+    blocks, used_indices = [], []
+    used = 0
+    for position, i in enumerate(selected):
+        allowance = (budget_tokens - used) // (len(selected) - position)
+        header = f"Article Title: {passages[i]['title']}\nArticle Text: "
+        text = passages[i]["text"] or ""
+        if estimate_tokens(header + text + "\n\n") > allowance:
+            text = _compress(text, allowance - estimate_tokens(header + "\n\n"))
+        if not text:
+            continue
+        block = header + text + "\n\n"
+        blocks.append(block)
+        used_indices.append(i)
+        used += estimate_tokens(block)
+
+    return blocks, used_indices, used
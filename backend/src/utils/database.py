@@ -1,9 +1,14 @@
 import os
+import uuid
+from contextlib import asynccontextmanager
 
 import psycopg2
 import psycopg2.extras
+from pgvector.asyncpg import register_vector as register_vector_async
 from pgvector.psycopg2 import register_vector
 from psycopg2 import extensions
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from src.db import models, schemas
 import datetime
 
@@ -13,15 +18,25 @@ import datetime
 #     DB_NAME: str
 
 
-def filter_out_existing_articles(articles, db_session):
+def _parse_published_at(published_at):
+    # Convert the ISO 8601 string to a Python datetime object
+    if not published_at:
+        return None
+    return datetime.datetime.fromisoformat(published_at.replace("Z", "+00:00"))
+
+
+def _clean(value):
+    # Postgres text columns reject NUL bytes, which some scraped pages contain
+    return value.replace("\x00", "") if isinstance(value, str) else value
+
+
+async def filter_out_existing_articles(articles, db_session: AsyncSession):
     all_incoming_urls = [article["url"] for article in articles]
-    existing_articles = (
-        db_session.query(models.Article)
-        .filter(models.Article.url.in_(all_incoming_urls))
-        .all()
+    existing_urls = set(
+        await db_session.scalars(
+            select(models.Article.url).where(models.Article.url.in_(all_incoming_urls))
+        )
     )
-
-    existing_urls = {article.url for article in existing_articles}
     unstored_articles = [
         article for article in articles if article["url"] not in existing_urls
     ]
@@ -48,12 +63,7 @@ def store_articles(articles_data, db_session):
                 author=article_data.get("author"),
                 title=article_data.get("title"),
                 description=article_data.get("description"),
-                # Convert the ISO 8601 string to a Python datetime object
-                publishedAt=datetime.datetime.fromisoformat(
-                    article_data.get("publishedAt").replace("Z", "+00:00")
-                )
-                if article_data.get("publishedAt")
-                else None,
+                publishedAt=_parse_published_at(article_data.get("publishedAt")),
                 scrape_successful=article_data.get("scrape_successful"),
                 text=article_data.get("text"),
             )
@@ -61,13 +71,16 @@ def store_articles(articles_data, db_session):
 
             # Create Chunk instances for each chunk and link them
             # to the newly created Article instance
-            for chunk_text, embeddings_list in zip(
-                article_data["chunks"], article_data["embeddings_list"]
+            chunk_offsets = article_data.get("chunk_offsets") or [(None, None)] * len(article_data["chunks"])
+            for chunk_text, embeddings_list, (start_char, end_char) in zip(
+                article_data["chunks"], article_data["embeddings_list"], chunk_offsets
             ):
                 chunk = models.Chunk(
                     content=chunk_text,
                     # The pgvector type correctly handles the list of floats.
                     embedding=embeddings_list,
+                    start_char=start_char,
+                    end_char=end_char,
                     article=article,
                 )
                 db_session.add(chunk)
@@ -80,6 +93,162 @@ def store_articles(articles_data, db_session):
             print(f"Failed to store article from {article_data.get('url')}. Error: {e}")
 
 
+# Every type pgvector.asyncpg.register_vector sets a binary codec for (halfvec and
+# sparsevec only on pgvector 0.7+)
+PGVECTOR_TYPES = ("vector", "halfvec", "sparsevec")
+
+
+def _article_row(article_data):
+    scrape_successful = article_data.get("scrape_successful")
+    return (
+        uuid.uuid4(),
+        _clean(article_data["url"]),
+        _clean(article_data.get("urlToImage")),
+        _clean(article_data.get("source")),
+        _clean(article_data.get("author")),
+        _clean(article_data.get("title")),
+        _clean(article_data.get("description")),
+        _parse_published_at(article_data.get("publishedAt")),
+        # The column is a string; keep the same "true"/"false" (or NULL) the ORM path stores
+        None if scrape_successful is None else str(scrape_successful).lower(),
+        _clean(article_data.get("text")),
+    )
+
+
+@asynccontextmanager
+async def _binary_vector_codecs(conn):
+    """
+    Registers pgvector's binary codecs for a COPY. SQLAlchemy's Vector type sends
+    vectors in the text format, so every codec is reset again before the connection
+    goes back to the pool. Both steps look the types up, so they run outside the
+    savepoints, which may be left aborted.
+    """
+    await register_vector_async(conn)
+    try:
+        yield
+    finally:
+        for typename in PGVECTOR_TYPES:
+            try:
+                await conn.reset_type_codec(typename)
+            except ValueError:  # Unknown type (older pgvector)
+                pass
+
+
+async def _insert_articles(conn, rows):
+    """
+    Inserts (article row, article data) pairs and the chunks of the articles that
+    were actually inserted. Returns the number of new articles.
+    """
+    inserted = await conn.fetch(
+        """
+        INSERT INTO articles (article_id, url, "urlToImage", source, author,
+                              title, description, "publishedAt",
+                              scrape_successful, text)
+        SELECT * FROM unnest($1::uuid[], $2::text[], $3::text[], $4::text[],
+                             $5::text[], $6::text[], $7::text[],
+                             $8::timestamptz[], $9::text[], $10::text[])
+        ON CONFLICT (url) DO NOTHING
+        RETURNING article_id, url
+        """,
+        *map(list, zip(*(row for row, _ in rows))),
+    )
+    inserted_ids = {row["url"]: row["article_id"] for row in inserted}
+    num_inserted = len(inserted_ids)
+
+    # Chunk rows for newly inserted articles only
+    chunk_records = []
+    for row, article_data in rows:
+        # pop, so a URL repeated within the batch only gets its chunks once
+        article_id = inserted_ids.pop(row[1], None)
+        if article_id is None:
+            continue
+        chunk_offsets = article_data.get("chunk_offsets") or [(None, None)] * len(article_data["chunks"])
+        for chunk_text, embedding, (start_char, end_char) in zip(
+            article_data["chunks"], article_data["embeddings_list"], chunk_offsets
+        ):
+            chunk_records.append(
+                (uuid.uuid4(), article_id, _clean(chunk_text), embedding, start_char, end_char)
+            )
+    await conn.copy_records_to_table(
+        "chunked_data",
+        records=chunk_records,
+        columns=["chunk_id", "article_id", "content", "embedding", "start_char", "end_char"],
+    )
+    return num_inserted
+
+
+async def _driver_connection(db_session: AsyncSession):
+    # The asyncpg connection behind the session. If the session already has a
+    # transaction open, conn.transaction() becomes a savepoint inside it.
+    sa_connection = await db_session.connection()
+    raw_connection = await sa_connection.get_raw_connection()
+    return raw_connection.driver_connection
+
+
+async def store_articles_bulk(articles_data, db_session: AsyncSession):
+    """
+    Persists a list of articles and their embeddings in a single transaction.
+
+    Articles are inserted with one multi-row INSERT ... ON CONFLICT (url) DO NOTHING,
+    so duplicate URLs are skipped instead of failing the batch. The chunks of the
+    articles that were actually inserted are then loaded with a binary COPY
+    (asyncpg's copy_records_to_table, using pgvector's binary vector codec).
+
+    If the batch fails (e.g. one article has a malformed embedding), the articles
+    are stored again one at a time, each in its own savepoint, so only the bad
+    ones are skipped.
+
+    Args:
+        articles_data (list): A list of dictionaries, where each dictionary
+                              represents a single article with its chunks and embeddings.
+        db_session: An SQLAlchemy AsyncSession (asyncpg) connected to the database.
+
+    Returns:
+        tuple[int, int]: The number of articles that were newly stored, and the
+                         number that were skipped because they failed.
+    """
+    rows, num_skipped = [], 0
+    for article_data in articles_data:
+        try:
+            rows.append((_article_row(article_data), article_data))
+        except Exception as e:
+            print(f"Skipping article from {article_data.get('url')}. Error: {e}")
+            num_skipped += 1
+
+    num_articles = len(articles_data)
+    if not rows:
+        return 0, num_skipped
+
+    try:
+        conn = await _driver_connection(db_session)
+        async with _binary_vector_codecs(conn):
+            async with conn.transaction():
+                num_inserted = await _insert_articles(conn, rows)
+        await db_session.commit()
+    except Exception as e:
+        await db_session.rollback()
+        print(f"Failed to bulk store {len(rows)} articles, storing them one at a time. Error: {e}")
+        num_inserted = 0
+        try:
+            conn = await _driver_connection(db_session)
+            async with _binary_vector_codecs(conn):
+                for row, article_data in rows:
+                    try:
+                        async with conn.transaction():
+                            num_inserted += await _insert_articles(conn, [(row, article_data)])
+                    except Exception as e:
+                        print(f"Skipping article from {article_data.get('url')}. Error: {e}")
+                        num_skipped += 1
+            await db_session.commit()
+        except Exception as e:
+            await db_session.rollback()
+            print(f"Failed to store {len(rows)} articles. Error: {e}")
+            return 0, num_articles
+
+    print(f"Successfully stored {num_inserted} of {num_articles} articles ({num_skipped} skipped).")
+    return num_inserted, num_skipped
+
+
 # def store_sql(article_chunks, USER, PWD, DB_NAME):
 #     """
 #     stores chunks into a postgreSQL database.
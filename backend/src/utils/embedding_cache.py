@@ -0,0 +1,90 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from src.config.config import get_settings
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a query into a cache key. all-MiniLM-L6-v2 uses an uncased tokenizer
+    that also ignores repeated whitespace, so this doesn't change the embedding.
+    """
+    return " ".join(query.lower().split())
+
+
+class EmbeddingCache:
+    """
+    Bounded, thread-safe LRU cache of query embeddings with a time-to-live.
+    Entries are evicted when the cache is full (least recently used first)
+    or when they are older than ttl_seconds.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl_seconds: float = 3600):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, embedding)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, query: str):
+        key = normalize_query(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, embedding = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(embedding)
+
+    def put(self, query: str, embedding: list[float]):
+        if self.maxsize <= 0:
+            return
+        key = normalize_query(query)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, tuple(embedding))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_query_embedding_cache():
+    """
+    Process-wide query embedding cache, sized from Settings.
+    """
+    settings = get_settings()
+    return EmbeddingCache(
+        maxsize=settings.EMBEDDING_CACHE_SIZE,
+        ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS,
+    )
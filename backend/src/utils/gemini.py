@@ -2,29 +2,160 @@
 google-genai
 """
 
+import asyncio
+from functools import lru_cache
+
 from google import genai
 from google.genai import types
 
+from src.config.config import get_settings
+from src.utils.gemini_cache import gemini_cache_key, get_gemini_response_cache
+
+GEMINI_MODEL = "gemini-2.5-flash"
+# Rate limited or transient server errors, retried with exponential backoff and jitter
+RETRYABLE_STATUS_CODES = [429, 500, 502, 503, 504]
+
+
+class GeminiClient:
+    """
+    Async Gemini client shared by every request in the process. It keeps one
+    pooled (keep-alive) HTTP client, caps the number of requests in flight,
+    retries 429/5xx responses with jittered exponential backoff and gives
+    each call a deadline covering all of its attempts.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str | None = None,
+        max_concurrency: int = 8,
+        timeout_seconds: float = 60,
+        max_retries: int = 3,
+        retry_initial_delay: float = 1.0,
+    ):
+        self.timeout_seconds = timeout_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(
+                base_url=base_url or None,
+                retry_options=types.HttpRetryOptions(
+                    attempts=max_retries + 1,
+                    initial_delay=retry_initial_delay,
+                    http_status_codes=RETRYABLE_STATUS_CODES,
+                ),
+            ),
+        )
+
+    async def generate(self, contents: str, instruction: str, model: str = GEMINI_MODEL) -> str:
+        """
+        Raises asyncio.TimeoutError if the call (including retries) takes longer
+        than timeout_seconds, or google.genai.errors.APIError once retries run out.
+        """
+        async with self._semaphore:
+            response = await asyncio.wait_for(
+                self._client.aio.models.generate_content(
+                    model=model,
+                    config=types.GenerateContentConfig(system_instruction=instruction),
+                    contents=contents,
+                ),
+                timeout=self.timeout_seconds,
+            )
+        return response.text
+
+    async def generate_stream(self, contents: str, instruction: str, model: str = GEMINI_MODEL):
+        """
+        Yields the answer text piece by piece as Gemini generates it. Here
+        timeout_seconds bounds the wait for each piece (the first one includes
+        the request and its retries) rather than the whole answer.
+        """
+        async with self._semaphore:
+            stream = await asyncio.wait_for(
+                self._client.aio.models.generate_content_stream(
+                    model=model,
+                    config=types.GenerateContentConfig(system_instruction=instruction),
+                    contents=contents,
+                ),
+                timeout=self.timeout_seconds,
+            )
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(anext(stream), timeout=self.timeout_seconds)
+                except StopAsyncIteration:
+                    break
+                if chunk.text:
+                    yield chunk.text
 
-def ask_gemini(prompt, content, instruction, GEMINI_API_KEY, test_mode=False):
+
+@lru_cache(maxsize=1)
+def get_gemini_client():
+    """
+    Process-wide Gemini client, configured from Settings.
+    """
+    settings = get_settings()
+    return GeminiClient(
+        api_key=settings.GEMINI_API_KEY,
+        base_url=settings.GEMINI_BASE_URL,
+        max_concurrency=settings.GEMINI_MAX_CONCURRENCY,
+        timeout_seconds=settings.GEMINI_TIMEOUT_SECONDS,
+        max_retries=settings.GEMINI_MAX_RETRIES,
+    )
+
+
+async def ask_gemini(prompt, content, instruction, test_mode=False, context_chunks=None):
+    """
+    context_chunks are the passages `content` was joined from, if any; they key
+    the response cache passage by passage.
+    """
     if test_mode:
         return "In test mode, will not call API"
-    client = genai.Client(api_key=GEMINI_API_KEY)
+
+    cache = get_gemini_response_cache()
+    cache_key = gemini_cache_key(GEMINI_MODEL, instruction, prompt, context_chunks or [content])
+    cached_response = await cache.get(cache_key)
+    if cached_response is not None:
+        return cached_response
 
     contents = (
         prompt + content + prompt
     )  # Putting prompt before and after context so it is not ignored
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        config=types.GenerateContentConfig(system_instruction=instruction),
-        contents=contents,
-    )
+    response = await get_gemini_client().generate(contents, instruction)
+    if response:
+        await cache.put(cache_key, GEMINI_MODEL, response)
+    return response
+
 
-    return response.text
+async def ask_gemini_stream(prompt, content, instruction, context_chunks=None):
+    """
+    Streaming ask_gemini: yields the answer in pieces. A cached answer comes back
+    as a single piece, and a streamed answer is cached once it is complete.
+    """
+    cache = get_gemini_response_cache()
+    cache_key = gemini_cache_key(GEMINI_MODEL, instruction, prompt, context_chunks or [content])
+    cached_response = await cache.get(cache_key)
+    if cached_response is not None:
+        yield cached_response
+        return
+
+    contents = (
+        prompt + content + prompt
+    )  # Putting prompt before and after context so it is not ignored
 
+    pieces = []
+    async for piece in get_gemini_client().generate_stream(contents, instruction):
+        pieces.append(piece)
+        yield piece
+    response = "".join(pieces)
+    if response:
+        await cache.put(cache_key, GEMINI_MODEL, response)
 
-def read_with_gemini(top_n_chunks, GEMINI_API_KEY):
+
+RAG_INSTRUCTIONS = "You don't know anything except the information provided for you. Base your answer solely off of this information provided."
+RAG_PROMPT = "Evaluate the validity of the users question, or generate an accurate summary from the information provided."
+
+
+async def read_with_gemini(top_n_chunks):
     """
     feed the chunks, a prompt, and system instructions into gemini
     """
@@ -33,11 +164,19 @@ def read_with_gemini(top_n_chunks, GEMINI_API_KEY):
     sep = ".\n"
     content = sep.join(top_n_chunks)
 
-    instructions = "You don't know anything except the information provided for you. Base your answer solely off of this information provided."
-    prompt = "Evaluate the validity of the users question, or generate an accurate summary from the information provided."
-
-    gemini_response = ask_gemini(
-        prompt, content, instructions, GEMINI_API_KEY, test_mode=False
+    gemini_response = await ask_gemini(
+        RAG_PROMPT, content, RAG_INSTRUCTIONS, test_mode=False, context_chunks=top_n_chunks
     )
 
     return gemini_response
+
+
+async def read_with_gemini_stream(top_n_chunks):
+    """
+    read_with_gemini, yielding the answer as it is generated
+    """
+    content = ".\n".join(top_n_chunks)
+    async for piece in ask_gemini_stream(
+        RAG_PROMPT, content, RAG_INSTRUCTIONS, context_chunks=top_n_chunks
+    ):
+        yield piece
@@ -0,0 +1,153 @@
+"""
+Postgres-backed cache of Gemini answers (gemini_response_cache table).
+
+The key hashes the model, system instruction, prompt and the ordered hashes of
+every context passage, so the same retrieved context is answered from the table
+in milliseconds instead of a paid LLM round trip. Any change to a contributing
+chunk or article changes its hash and so the key. Old answers are never served
+for new content, and entries older than GEMINI_CACHE_TTL_SECONDS are refreshed.
+Expired rows that are never asked for again are deleted by purge_expired, which
+the ingest worker runs periodically.
+"""
+
+import datetime
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.config.config import get_settings
+from src.db import models
+from src.db.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def _sha256(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
+
+
+def gemini_cache_key(model: str, instruction: str, prompt: str, context_chunks: list[str]) -> str:
+    """
+    Hashes everything that determines a Gemini answer. Passages are hashed one
+    by one and in order, so reordering them gives a different key.
+    """
+    parts = [model, instruction, prompt, *(_sha256(chunk) for chunk in context_chunks)]
+    return _sha256("\0".join(parts))
+
+
+class GeminiResponseCache:
+    """
+    Reads and writes cached answers, counting hits, misses (including expired
+    entries) and errors. A database error is logged and treated as a miss,
+    so the cache can never fail a request.
+    """
+
+    def __init__(self, ttl_seconds: float = 86400):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.purged = 0
+        self.errors = 0
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    async def get(self, key: str) -> str | None:
+        if self.ttl_seconds <= 0:
+            return None
+        try:
+            async with AsyncSessionLocal() as db:
+                row = (
+                    await db.execute(
+                        select(models.GeminiResponse.response, models.GeminiResponse.created_at)
+                        .where(models.GeminiResponse.cache_key == key)
+                    )
+                ).first()
+        except Exception as e:
+            logger.warning(f"Gemini cache lookup failed: {e}")
+            self._count("errors")
+            return None
+
+        if row is None:
+            self._count("misses")
+            return None
+        age = datetime.datetime.now(datetime.timezone.utc) - row.created_at
+        if age.total_seconds() >= self.ttl_seconds:
+            self._count("expirations")
+            self._count("misses")
+            return None
+        self._count("hits")
+        return row.response
+
+    async def put(self, key: str, model: str, response: str):
+        if self.ttl_seconds <= 0:
+            return
+        statement = insert(models.GeminiResponse).values(
+            cache_key=key,
+            model=model,
+            response=response,
+            created_at=datetime.datetime.now(datetime.timezone.utc),
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[models.GeminiResponse.cache_key],
+            set_={
+                "response": statement.excluded.response,
+                "created_at": statement.excluded.created_at,
+            },
+        )
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.execute(statement)
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Gemini cache write failed: {e}")
+            self._count("errors")
+
+    async def purge_expired(self) -> int:
+        """
+        Deletes the entries older than the TTL and returns how many were removed.
+        """
+        if self.ttl_seconds <= 0:
+            return 0
+        cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=self.ttl_seconds)
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    delete(models.GeminiResponse).where(models.GeminiResponse.created_at < cutoff)
+                )
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"Gemini cache purge failed: {e}")
+            self._count("errors")
+            return 0
+        with self._lock:
+            self.purged += result.rowcount
+        return result.rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "purged": self.purged,
+                "errors": self.errors,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_gemini_response_cache():
+    """
+    Process-wide Gemini response cache, configured from Settings.
+    """
+    return GeminiResponseCache(ttl_seconds=get_settings().GEMINI_CACHE_TTL_SECONDS)
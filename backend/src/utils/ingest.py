@@ -0,0 +1,569 @@
+"""
+Background ingestion of NewsAPI queries into the articles / chunked_data tables.
+
+POST /rag/store-query/ only enqueues an IngestJob. `python -m src.worker`
+processes claim queued jobs from Postgres and run them: fetch the NewsAPI
+result pages, then scrape, chunk, embed and store the articles in batches.
+Each article's progress is recorded in ingest_job_articles, so a job that is
+interrupted resumes where it left off. Any number of workers, on any number
+of hosts, can drain the same queue.
+"""
+
+import asyncio
+import datetime
+import logging
+
+from sqlalchemy import func, or_, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+
+from src.config.config import get_settings
+from src.db import models
+from src.db.database import AsyncSessionLocal
+from src.utils.database import filter_out_existing_articles, store_articles_bulk
+from src.utils.embedding_cache import normalize_query
+from src.utils.local_models import add_embeddings, chunkify
+from src.utils.news_functions import extract_newspaper_contents
+from src.utils.news_gateway import get_news_gateway
+
+logger = logging.getLogger(__name__)
+
+# Number of chunks sent to the embedding model per encode call during ingestion
+EMBEDDING_BATCH_SIZE = 128
+
+# NewsAPI article fields kept for storage ("source" is flattened to its name)
+ARTICLE_PROPERTIES = [
+    "url",
+    "urlToImage",
+    "source",
+    "author",
+    "title",
+    "description",
+    "publishedAt",
+    "content",
+]
+
+ARTICLE_STATES = ("pending", "scraped", "embedded", "stored", "skipped", "failed")
+# Article states that still have work left
+OPEN_STATES = ("pending", "scraped", "embedded")
+
+
+def news_api_article_to_record(article: dict) -> dict:
+    """
+    Transforms an article from a News API response into the dict the ingest stages expect.
+    """
+    record = {}
+    for prop in ARTICLE_PROPERTIES:
+        if prop == "source":
+            record["source"] = (article.get("source") or {}).get("name")
+        else:
+            record[prop] = article.get(prop)
+    return record
+
+
+async def scrape_and_chunk_article(article_data: dict, model):
+    """
+    Asynchronously scrapes and chunks a single article, counting chunk tokens with
+    the embedding model's tokenizer. Embedding is deferred to embed_articles, so
+    chunks from every article can be batched together.
+    """
+    try:
+        # Use httpx for async requests
+        article_content_dict = await extract_newspaper_contents(article_data["url"])
+
+        if not article_content_dict:
+            article_data["text"] = article_data.get("content", "")
+            article_data["scrape_successful"] = False
+        else:
+            article_data["text"] = article_content_dict.get("text", "")
+            article_data["scrape_successful"] = True
+
+    except Exception as e:
+        # Handle scraping errors gracefully without stopping the entire process
+        print(f"Error scraping {article_data.get('url')}: {e}")
+        article_data["text"] = article_data.get("content", "")
+        article_data["scrape_successful"] = False
+
+    # Stored text drops NUL bytes, so drop them first to keep the chunk offsets aligned with it
+    article_data["text"] = (article_data.get("text") or "").replace("\x00", "")
+    settings = get_settings()
+    chunks = await asyncio.to_thread(
+        list,
+        chunkify(article_data["text"], model, settings.CHUNK_MAX_TOKENS, settings.CHUNK_OVERLAP_TOKENS),
+    )
+    article_data["chunks"] = [chunk for chunk, _, _ in chunks]
+    article_data["chunk_offsets"] = [(start, end) for _, start, end in chunks]
+    return article_data
+
+
+async def embed_articles(
+    articles: list[dict], model, batch_size: int = EMBEDDING_BATCH_SIZE
+) -> list[dict]:
+    """
+    Embeds the chunks of every article in fixed-size batches on a worker thread,
+    then maps the embeddings back onto the article they came from.
+    """
+    # Flatten every chunk, remembering which article (and position) it belongs to
+    all_chunks = [chunk for article in articles for chunk in article["chunks"]]
+
+    # Sort by length so each batch pads to a similar size, then restore order below
+    order = sorted(range(len(all_chunks)), key=lambda i: len(all_chunks[i]))
+    embeddings = [None] * len(all_chunks)
+    for start in range(0, len(order), batch_size):
+        batch_ids = order[start : start + batch_size]
+        batch_embeddings = await asyncio.to_thread(
+            add_embeddings, [all_chunks[i] for i in batch_ids], model, batch_size
+        )
+        for i, embedding in zip(batch_ids, batch_embeddings):
+            embeddings[i] = embedding
+
+    offset = 0
+    for article in articles:
+        num_chunks = len(article["chunks"])
+        article["embeddings_list"] = embeddings[offset : offset + num_chunks]
+        offset += num_chunks
+
+    return articles
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def retry_delay(attempts: int, base_seconds: float) -> datetime.timedelta:
+    """
+    Exponential backoff: base_seconds after the first failed attempt, doubling after each one.
+    """
+    return datetime.timedelta(seconds=base_seconds * 2 ** (attempts - 1))
+
+
+async def enqueue_ingest_job(
+    db,
+    query: str,
+    idempotency_key: str | None = None,
+    from_date: datetime.datetime | None = None,
+    sort_by: str = "relevancy",
+    topic_id=None,
+    to_date: datetime.datetime | None = None,
+):
+    """
+    Queues an ingest job for a query, unless it would duplicate one: a job with
+    the same idempotency key (in any state) or a queued / running job for the
+    same query (ignoring case and spacing), sort_by, from_date, to_date and
+    topic_id is returned instead. The query itself is stored and sent to NewsAPI
+    unchanged.
+
+    from_date / to_date limit the job to articles published since / until then,
+    and topic_id links it to the watchlist topic it polls.
+
+    Returns:
+        tuple[models.IngestJob, bool]: The job, and whether it was created by this call.
+    """
+    query_key = normalize_query(query)
+    job = models.IngestJob
+    # The conflicting job can finish between the insert and the lookup, so try again
+    for _ in range(3):
+        job_id = await db.scalar(
+            insert(job)
+            .values(
+                query=query,
+                query_key=query_key,
+                idempotency_key=idempotency_key,
+                from_date=from_date,
+                to_date=to_date,
+                sort_by=sort_by,
+                topic_id=topic_id,
+            )
+            .on_conflict_do_nothing()
+            .returning(job.job_id)
+        )
+        await db.commit()
+        if job_id is not None:
+            return await db.get(job, job_id), True
+
+        duplicate = (
+            (job.query_key == query_key)
+            & (job.sort_by == sort_by)
+            & job.from_date.is_not_distinct_from(from_date)
+            & job.to_date.is_not_distinct_from(to_date)
+            & job.topic_id.is_not_distinct_from(topic_id)
+            & job.status.in_(("queued", "running"))
+        )
+        if idempotency_key is not None:
+            duplicate = or_(job.idempotency_key == idempotency_key, duplicate)
+        existing = await db.scalar(select(job).where(duplicate).limit(1))
+        if existing is not None:
+            return existing, False
+    raise RuntimeError(f"Could not queue an ingest job for {query!r}")
+
+
+def upgrade_ingest_jobs_table(bind):
+    """
+    Moves an ingest_jobs table created before query_key existed onto it (run at
+    startup, after add_missing_columns). Those jobs stored the normalized query,
+    so it is their key, and the old unique indexes on the query alone are replaced.
+    """
+    with bind.begin() as conn:
+        conn.execute(text("UPDATE ingest_jobs SET query_key = query WHERE query_key IS NULL"))
+        conn.execute(text("DROP INDEX IF EXISTS uq_ingest_jobs_active_query"))
+        conn.execute(text("DROP INDEX IF EXISTS uq_ingest_jobs_active_query_key"))
+    for index in models.IngestJob.__table__.indexes:
+        index.create(bind=bind, checkfirst=True)
+
+
+async def claim_job(db, worker_id: str, lease_seconds: float):
+    """
+    Claims the next due job for this worker: a queued job whose run_after has
+    passed, or a running job whose worker stopped renewing its lease. Rows
+    locked by other workers are skipped, so concurrent workers never wait on
+    each other or claim the same job.
+
+    Returns:
+        UUID | None: The claimed job_id, or None if nothing is due.
+    """
+    now = _now()
+    job = models.IngestJob
+    due_job = (
+        select(job.job_id)
+        .where(
+            or_(
+                (job.status == "queued") & (job.run_after <= now),
+                (job.status == "running")
+                & (job.locked_at < now - datetime.timedelta(seconds=lease_seconds)),
+            )
+        )
+        .order_by(job.run_after)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    job_id = await db.scalar(
+        update(job)
+        .where(job.job_id == due_job)
+        .values(status="running", locked_by=worker_id, locked_at=now)
+        .returning(job.job_id)
+    )
+    await db.commit()
+    return job_id
+
+
+async def _update_job(db, job_id, worker_id: str, **values) -> bool:
+    """
+    Updates a job this worker holds. Returns False if it lost the lease to another worker.
+    """
+    result = await db.execute(
+        update(models.IngestJob)
+        .where(models.IngestJob.job_id == job_id, models.IngestJob.locked_by == worker_id)
+        .values(**values)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def _set_article_state(db, job_id, urls, **values):
+    if urls:
+        await db.execute(
+            update(models.IngestJobArticle)
+            .where(
+                models.IngestJobArticle.job_id == job_id,
+                models.IngestJobArticle.url.in_(urls),
+            )
+            .values(**values)
+        )
+
+
+async def _retry_or_fail(db, job_id, failures: list[tuple[str, int]], error: str, settings):
+    """
+    Schedules each failed (url, attempts) for another attempt with backoff, or
+    marks it failed once it has used INGEST_MAX_ATTEMPTS.
+    """
+    for url, attempts in failures:
+        if attempts >= settings.INGEST_MAX_ATTEMPTS:
+            await _set_article_state(
+                db, job_id, [url], state="failed", attempts=attempts, last_error=error
+            )
+        else:
+            await _set_article_state(
+                db,
+                job_id,
+                [url],
+                state="pending",
+                attempts=attempts,
+                next_attempt_at=_now() + retry_delay(attempts, settings.INGEST_RETRY_BASE_SECONDS),
+                last_error=error,
+            )
+
+
+async def _add_articles(db, job_id, articles: list[dict]):
+    """
+    Records a page of NewsAPI articles for the job. Articles that are already
+    stored are recorded as skipped, and URLs the job already has are ignored.
+    """
+    records = {}
+    for article in articles:
+        if article.get("url"):
+            records.setdefault(article["url"], news_api_article_to_record(article))
+    if not records:
+        return
+
+    new_urls = {
+        record["url"] for record in await filter_out_existing_articles(list(records.values()), db)
+    }
+    rows = [
+        {
+            "job_id": job_id,
+            "url": url,
+            "article": record,
+            "state": "pending" if url in new_urls else "skipped",
+        }
+        for url, record in records.items()
+    ]
+    await db.execute(insert(models.IngestJobArticle).values(rows).on_conflict_do_nothing())
+    await db.commit()
+
+
+async def _process_batch(db, job_id, rows, embedding_model, settings):
+    """
+    Scrapes, chunks, embeds and stores one batch of (url, article, attempts) rows.
+    A failed scrape is retried later; on its last attempt the article is stored
+    from its NewsAPI content, as before.
+    """
+    scraped = await asyncio.gather(
+        *[scrape_and_chunk_article(dict(article), embedding_model) for _, article, _ in rows]
+    )
+
+    to_store, scrape_failures = [], []
+    for (url, _, attempts), article_data in zip(rows, scraped):
+        if article_data["scrape_successful"] or attempts + 1 >= settings.INGEST_MAX_ATTEMPTS:
+            to_store.append((url, attempts + 1, article_data))
+        else:
+            scrape_failures.append((url, attempts + 1))
+    await _retry_or_fail(db, job_id, scrape_failures, "scrape failed", settings)
+    stored_urls = [url for url, _, _ in to_store]
+    await _set_article_state(
+        db, job_id, stored_urls, state="scraped", attempts=models.IngestJobArticle.attempts + 1
+    )
+    await db.commit()
+    if not to_store:
+        return
+
+    try:
+        processed_articles = await embed_articles(
+            [article_data for _, _, article_data in to_store], embedding_model
+        )
+    except Exception as e:
+        logger.exception(f"Embedding failed for {len(to_store)} articles")
+        await _retry_or_fail(
+            db, job_id, [(url, attempts) for url, attempts, _ in to_store], f"embed failed: {e}", settings
+        )
+        await db.commit()
+        return
+    await _set_article_state(db, job_id, stored_urls, state="embedded")
+    await db.commit()
+
+    # store_articles_bulk commits (or rolls back) on its own and doesn't raise,
+    # so check which articles actually made it into the table
+    await store_articles_bulk(processed_articles, db)
+    in_table = set(
+        await db.scalars(select(models.Article.url).where(models.Article.url.in_(stored_urls)))
+    )
+    await _set_article_state(db, job_id, [url for url in stored_urls if url in in_table], state="stored")
+    await _retry_or_fail(
+        db,
+        job_id,
+        [(url, attempts) for url, attempts, _ in to_store if url not in in_table],
+        "store failed",
+        settings,
+    )
+    await db.commit()
+
+
+async def _process_due_articles(db, job_id, embedding_model, worker_id, settings, stopping):
+    """
+    Processes the job's articles that are due, a batch at a time, renewing the
+    job's lease after each batch. Returns False if the worker should stop
+    (it lost the lease, or is shutting down).
+    """
+    article = models.IngestJobArticle
+    while stopping is None or not stopping.is_set():
+        rows = (
+            await db.execute(
+                select(article.url, article.article, article.attempts)
+                .where(
+                    article.job_id == job_id,
+                    article.state.in_(OPEN_STATES),
+                    article.next_attempt_at <= _now(),
+                )
+                .limit(settings.INGEST_BATCH_SIZE)
+            )
+        ).all()
+        if not rows:
+            return True
+        await _process_batch(db, job_id, rows, embedding_model, settings)
+        if not await _update_job(db, job_id, worker_id, locked_at=_now()):
+            logger.warning(f"Lost the lease on ingest job {job_id}")
+            return False
+    return False
+
+
+def _news_api_date(value: datetime.datetime | None) -> str | None:
+    # NewsAPI takes the date in UTC, to the second
+    return value and value.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+async def run_job(job_id, embedding_model, worker_id: str, stopping: asyncio.Event | None = None):
+    """
+    Runs a claimed job until its articles are all stored, skipped or failed.
+
+    If some articles are waiting for a retry, the job goes back to the queue
+    (run_after = the first retry time) instead of holding the worker. If the
+    job itself fails (e.g. a NewsAPI error), it is retried with backoff up to
+    INGEST_MAX_ATTEMPTS times. If `stopping` is set, the job is handed back to
+    the queue after the current batch.
+
+    Returns:
+        str: The job's status afterwards (queued, succeeded or failed).
+    """
+    settings = get_settings()
+    async with AsyncSessionLocal() as db:
+        query, attempts = None, None
+        try:
+            job = await db.get(models.IngestJob, job_id)
+            query, stage, attempts, sort_by = job.query, job.stage, job.attempts, job.sort_by
+            from_date, to_date = _news_api_date(job.from_date), _news_api_date(job.to_date)
+            keep_going = True
+            if stage == "fetching":
+                pages = get_news_gateway().get_pages(
+                    "everything",
+                    query,
+                    from_date=from_date,
+                    sort_by=sort_by,
+                    max_pages=settings.NEWS_API_MAX_PAGES,
+                    to_date=to_date,
+                )
+                pages_fetched = 0
+                async for page_data in pages:
+                    await _add_articles(db, job_id, page_data.get("articles", []))
+                    pages_fetched += 1
+                    await _update_job(
+                        db,
+                        job_id,
+                        worker_id,
+                        pages_fetched=pages_fetched,
+                        total_results=page_data.get("totalResults"),
+                    )
+                    # Work on this page's articles while the remaining pages download
+                    keep_going = await _process_due_articles(
+                        db, job_id, embedding_model, worker_id, settings, stopping
+                    )
+                    if not keep_going:
+                        await pages.aclose()
+                        break
+                if keep_going:
+                    await _update_job(db, job_id, worker_id, stage="processing")
+
+            if keep_going:
+                keep_going = await _process_due_articles(
+                    db, job_id, embedding_model, worker_id, settings, stopping
+                )
+            if not keep_going:
+                # A no-op if the lease was lost, since the job then belongs to another worker
+                await _update_job(
+                    db, job_id, worker_id, status="queued", run_after=_now(), locked_by=None, locked_at=None
+                )
+                return "queued"
+
+            next_attempt_at = await db.scalar(
+                select(func.min(models.IngestJobArticle.next_attempt_at)).where(
+                    models.IngestJobArticle.job_id == job_id,
+                    models.IngestJobArticle.state.in_(OPEN_STATES),
+                )
+            )
+            if next_attempt_at is None:
+                await _update_job(
+                    db,
+                    job_id,
+                    worker_id,
+                    status="succeeded",
+                    stage="done",
+                    finished_at=_now(),
+                    locked_by=None,
+                    locked_at=None,
+                )
+                logger.info(f"Ingest job {job_id} ({query!r}) finished")
+                return "succeeded"
+            else:
+                await _update_job(
+                    db,
+                    job_id,
+                    worker_id,
+                    status="queued",
+                    run_after=next_attempt_at,
+                    locked_by=None,
+                    locked_at=None,
+                )
+                return "queued"
+        except Exception as e:
+            logger.exception(f"Ingest job {job_id} ({query!r}) failed")
+            await db.rollback()
+            if attempts is None:
+                # Failed before the job was loaded
+                attempts = await db.scalar(
+                    select(models.IngestJob.attempts).where(models.IngestJob.job_id == job_id)
+                )
+            attempts += 1
+            if attempts >= settings.INGEST_MAX_ATTEMPTS:
+                status = {"status": "failed", "finished_at": _now()}
+            else:
+                status = {
+                    "status": "queued",
+                    "run_after": _now() + retry_delay(attempts, settings.INGEST_RETRY_BASE_SECONDS),
+                }
+            await _update_job(
+                db,
+                job_id,
+                worker_id,
+                **status,
+                attempts=attempts,
+                last_error=str(e),
+                locked_by=None,
+                locked_at=None,
+            )
+            return status["status"]
+
+
+async def get_job_status(db, job_id) -> dict | None:
+    """
+    The job's state, with the number of its articles in each state.
+    """
+    job = await db.get(models.IngestJob, job_id)
+    if job is None:
+        return None
+    counts = dict(
+        (
+            await db.execute(
+                select(models.IngestJobArticle.state, func.count())
+                .where(models.IngestJobArticle.job_id == job_id)
+                .group_by(models.IngestJobArticle.state)
+            )
+        ).all()
+    )
+    retrying = await db.scalar(
+        select(func.count()).where(
+            models.IngestJobArticle.job_id == job_id,
+            models.IngestJobArticle.state == "pending",
+            models.IngestJobArticle.attempts > 0,
+        )
+    )
+    return {
+        "job_id": job.job_id,
+        "query": job.query,
+        "status": job.status,
+        "stage": job.stage,
+        "attempts": job.attempts,
+        "pages_fetched": job.pages_fetched,
+        "articles": {state: counts.get(state, 0) for state in ARTICLE_STATES},
+        "articles_retrying": retrying,
+        "last_error": job.last_error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
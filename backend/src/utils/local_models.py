@@ -1,8 +1,16 @@
+import asyncio
 from functools import lru_cache
 
+import nltk
+from nltk.tokenize.punkt import PunktTokenizer
+
 # from keybert import KeyBERT
 from sentence_transformers import SentenceTransformer
 
+from src.config.config import get_settings
+from src.utils.embedding_cache import get_query_embedding_cache
+from src.utils.model_registry import model_registry
+
 
 # @lru_cache(maxsize=1)
 # def get_keybert_model():
@@ -24,13 +32,71 @@ from sentence_transformers import SentenceTransformer
 #     return None
 
 
-@lru_cache(maxsize=1)
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# ONNX files of an exported model folder (see src/export_embedding_model.py), per EMBEDDING_BACKEND
+ONNX_FILE_NAMES = {
+    "onnx": "onnx/model.onnx",
+    "onnx-int8": "onnx/model_qint8.onnx",
+}
+
+
+def load_embeddings_model(backend: str = "torch", model_dir: str = "") -> SentenceTransformer:
+    """
+    Loads the miniLM-L6 model on the given backend: "torch", or ONNX Runtime
+    with fp32 ("onnx") or dynamically quantized int8 ("onnx-int8") weights.
+
+    Args:
+        backend (str): The EMBEDDING_BACKEND setting.
+        model_dir (str): Local model folder. The ONNX backends need one, exported by
+            `python -m src.export_embedding_model`. Empty loads the torch model from the Hub.
+
+    Returns:
+        SentenceTransformer: The model; encode works the same on every backend.
+    """
+    if backend == "torch":
+        return SentenceTransformer(model_dir or EMBEDDING_MODEL_NAME)
+    if backend not in ONNX_FILE_NAMES:
+        raise ValueError(f"Unknown EMBEDDING_BACKEND {backend!r}, expected torch, onnx or onnx-int8")
+    if not model_dir:
+        raise ValueError(f"EMBEDDING_BACKEND={backend} needs EMBEDDING_MODEL_DIR set to an exported model folder")
+    return SentenceTransformer(
+        model_dir, backend="onnx", model_kwargs={"file_name": ONNX_FILE_NAMES[backend]}
+    )
+
+
+model_registry.register(
+    "embeddings",
+    lambda: load_embeddings_model(get_settings().EMBEDDING_BACKEND, get_settings().EMBEDDING_MODEL_DIR),
+)
+
+
 def get_embeddings_model():
     """
-    Loads the miniLM-L6 model
+    Returns the miniLM-L6 model, loading it once through the model registry
     """
-    print("Loading miniLM model...")  # Add print for demonstration of one-time load
-    return SentenceTransformer("all-MiniLM-L6-v2")
+    return model_registry.get("embeddings")
+
+
+async def embed_query(query: str, model: SentenceTransformer) -> list[float]:
+    """
+    Embeds a search query, going through the shared query embedding cache.
+    A cache hit skips the transformer forward pass entirely; a miss runs it on a
+    worker thread, so it doesn't block the event loop.
+
+    Args:
+        query (str): The user's search query.
+        model (SentenceTransformer): The model used on a cache miss.
+
+    Returns:
+        List[float]: The query embedding.
+    """
+    cache = get_query_embedding_cache()
+    query_vector = cache.get(query)
+    if query_vector is None:
+        query_vector = (await asyncio.to_thread(model.encode, query, convert_to_tensor=False)).tolist()
+        cache.put(query, query_vector)
+    return query_vector
 
 
 # def add_embeddings(article_chunks, sentence_model):
@@ -43,44 +109,115 @@ def get_embeddings_model():
 #     return embeddings.tolist()
 
 
-def chunkify(text: str, max_chunk_size: int = 300) -> list[str]:
+def load_punkt():
+    """
+    Loads nltk's punkt sentence splitter (the Docker image ships punkt_tab), downloading it only if missing.
+    Shared by chunking (span_tokenize) and the bias / summary routes (split_sentences).
     """
-    Splits a single string of text into chunks of a maximum size.
+    try:
+        nltk.data.find("tokenizers/punkt_tab")
+    except LookupError:
+        nltk.download("punkt_tab")
+    return PunktTokenizer()
 
-    Args:
-        text (str): The text to chunk.
-        max_chunk_size (int): The maximum number of words per chunk.
 
-    Returns:
-        List[str]: A list of text chunks.
+model_registry.register("punkt", load_punkt)
+
+
+def split_sentences(text: str) -> list[str]:
     """
-    if not text or len(text.split()) == 0:
-        return []
+    Splits text into sentences with the shared punkt splitter (what nltk.sent_tokenize does).
+    """
+    return model_registry.get("punkt").tokenize(text)
 
-    words = text.split()
-    chunks = []
 
-    # Check if the text is already small enough
-    if len(words) < max_chunk_size:
-        chunks.append(" ".join(words))
-        return chunks
+def _token_pieces(text: str, tokenizer, max_tokens: int):
+    """
+    Yields (start_char, end_char, num_tokens) for every sentence of the text.
+    A sentence longer than max_tokens is cut into pieces of max_tokens tokens.
+    """
+    spans = list(model_registry.get("punkt").span_tokenize(text))
+    sentences = [text[start:end] for start, end in spans]
+    lengths = tokenizer(sentences, add_special_tokens=False, return_length=True)["length"]
+    for (start, end), sentence, length in zip(spans, sentences, lengths):
+        if length <= max_tokens:
+            yield start, end, length
+            continue
+        offsets = tokenizer(sentence, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        for i in range(0, len(offsets), max_tokens):
+            window = offsets[i : i + max_tokens]
+            yield start + window[0][0], start + window[-1][1], len(window)
+
+
+def chunk_sentences(text: str, tokenizer, max_tokens: int, overlap_tokens: int = 0):
+    """
+    Packs whole sentences into chunks of at most max_tokens tokens, counted with
+    the given (fast) tokenizer. Each chunk starts with the last sentences of the
+    previous one, up to overlap_tokens tokens. Chunks are yielded as they are built.
+
+    Args:
+        text (str): The text to chunk.
+        tokenizer: The embedding model's tokenizer.
+        max_tokens (int): Tokens per chunk, not counting the special tokens.
+        overlap_tokens (int): Tokens repeated from the end of the previous chunk.
+
+    Yields:
+        tuple[str, int, int]: The chunk, and its start and end offsets in text.
+    """
+    if not text or not text.strip():
+        return
+
+    window, window_tokens = [], 0
+    for piece in _token_pieces(text, tokenizer, max_tokens):
+        if window and window_tokens + piece[2] > max_tokens:
+            start, end = window[0][0], window[-1][1]
+            yield text[start:end], start, end
+            # Carry over the trailing sentences that fit in the overlap (and next to this piece)
+            carried, carried_tokens = [], 0
+            for previous in reversed(window):
+                if carried_tokens + previous[2] > min(overlap_tokens, max_tokens - piece[2]):
+                    break
+                carried.insert(0, previous)
+                carried_tokens += previous[2]
+            window, window_tokens = carried, carried_tokens
+        window.append(piece)
+        window_tokens += piece[2]
+
+    if window:
+        start, end = window[0][0], window[-1][1]
+        yield text[start:end], start, end
+
+
+def chunkify(text: str, model: SentenceTransformer, max_tokens: int = 0, overlap_tokens: int = 0):
+    """
+    Splits article text into sentence-aligned chunks that fit the embedding
+    model's input, so no tokens are truncated when the chunks are encoded.
 
-    # Chunk the text
-    for i in range(0, len(words), max_chunk_size):
-        chunk = " ".join(words[i : i + max_chunk_size])
-        chunks.append(chunk)
+    Args:
+        text (str): The text to chunk.
+        model (SentenceTransformer): The embedding model, whose tokenizer counts the tokens.
+        max_tokens (int): Tokens per chunk, capped at (and by default) the model's max_seq_length.
+        overlap_tokens (int): Tokens repeated from the end of the previous chunk.
 
-    return chunks
+    Yields:
+        tuple[str, int, int]: The chunk, and its start and end offsets in text.
+    """
+    max_tokens = min(max_tokens or model.max_seq_length, model.max_seq_length)
+    max_tokens -= model.tokenizer.num_special_tokens_to_add()  # [CLS] and [SEP]
+    yield from chunk_sentences(text, model.tokenizer, max_tokens, overlap_tokens)
 
 
 # This is an example of what your add_embeddings() might look like
-def add_embeddings(chunks: list[str], model: SentenceTransformer) -> list[list[float]]:
+def add_embeddings(
+    chunks: list[str], model: SentenceTransformer, batch_size: int = 32
+) -> list[list[float]]:
     """
     Generates embeddings for a list of text chunks using a pre-trained model.
 
     Args:
         chunks (List[str]): A list of text chunks.
         model (SentenceTransformer): The pre-trained model to use for embeddings.
+        batch_size (int): The number of chunks per forward pass.
 
     Returns:
         List[List[float]]: A list of embeddings, where each embedding is a list of floats.
@@ -88,6 +225,6 @@ def add_embeddings(chunks: list[str], model: SentenceTransformer) -> list[list[f
     if not chunks:
         return []
 
-    embeddings = model.encode(chunks, convert_to_tensor=False)
+    embeddings = model.encode(chunks, batch_size=batch_size, convert_to_tensor=False)
     # Convert embeddings to a list of lists for easy storage
     return embeddings.tolist()
@@ -0,0 +1,78 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """
+    Holds the loaders for every model the API uses, and loads each one at most
+    once per process: either on first use, or ahead of time by warm_up()
+    (run in a background thread at startup). Importing a module only registers
+    its loaders, so the server can start answering requests straight away.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._status = {}
+        self._locks = {}
+
+    def register(self, name: str, loader):
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+        self._status[name] = {"state": "not_loaded", "load_seconds": None, "error": None}
+
+    def get(self, name: str):
+        """
+        Returns the model, loading it first if needed. Concurrent callers wait
+        for a single load instead of each loading their own copy.
+        """
+        if name in self._models:
+            return self._models[name]
+
+        with self._locks[name]:
+            if name in self._models:
+                return self._models[name]
+
+            self._status[name] = {"state": "loading", "load_seconds": None, "error": None}
+            logger.info(f"Loading model: {name}")
+            start = time.perf_counter()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                self._status[name] = {
+                    "state": "failed",
+                    "load_seconds": time.perf_counter() - start,
+                    "error": str(e),
+                }
+                raise
+            self._models[name] = model
+            self._status[name] = {
+                "state": "ready",
+                "load_seconds": time.perf_counter() - start,
+                "error": None,
+            }
+            logger.info(f"Loaded model {name} in {self._status[name]['load_seconds']:.1f}s")
+            return model
+
+    def warm_up(self):
+        """
+        Loads every registered model. A failure is recorded in status() and
+        the remaining models still load.
+        """
+        for name in list(self._loaders):
+            try:
+                self.get(name)
+            except Exception:
+                logger.exception(f"Failed to load model: {name}")
+
+    def status(self) -> dict:
+        return {name: dict(status) for name, status in self._status.items()}
+
+    def is_ready(self) -> bool:
+        return all(status["state"] == "ready" for status in self._status.values())
+
+
+model_registry = ModelRegistry()
@@ -9,83 +9,43 @@ newspaper3k
 import logging
 
 import asyncio
-import httpx
-import requests
-from newspaper import Article
-from newspaper.article import ArticleException
 
-logger = logging.getLogger(__name__)
-
-
-def call_news_api(keyword, date, NEWS_API_KEY, everything=True):
-    API_KEY = NEWS_API_KEY
-
-    # choose endpoint
-    endpoint = "everything" if everything else "top-headlines"
-    # build URL with the passed-in variables
-
-    url = (
-        f"https://newsapi.org/v2/{endpoint}"
-        f"?q={keyword}"
-        f"&from={date}"
-        "&sortBy=relevancy"
-        f"&apiKey={API_KEY}"
-    )
-    response = requests.get(url)
-    return response
-
-
-async def query_news_api(
-    client: httpx.AsyncClient,
-    keyword: str,
-    NEWS_API_KEY: str,
-    everything: bool = True,
-    sortBy: str | None = None,
-):
-    """
-    Asynchronously queries the News API using httpx.
-    """
-    endpoint = "everything" if everything else "top-headlines"
-    assert sortBy in ["relevancy", "popularity", "publishedAt", None]
-    sortString = f"&sortBy={sortBy}" if (sortBy and endpoint == "everything") else ""
-    pageSizeDefault = 100
+from src.utils.scrape_cache import ScrapeError, get_article
+from src.utils.scrape_executor import get_scrape_executor
 
-    url = (
-        f"https://newsapi.org/v2/{endpoint}"
-        f"?q={keyword}"
-        f"&apiKey={NEWS_API_KEY}"
-        f"&pageSize={pageSizeDefault}" + sortString
-    )
-    # Use the async client to make a non-blocking request
-    response = await client.get(url)
-    return response
+logger = logging.getLogger(__name__)
 
 
-def _extract_newspaper_contents_sync(article_url: str):
+async def _extract_newspaper_contents(article_url: str, timeout: float | None = None):
     """
-    Synchronously downloads and parses an article using the newspaper3k library.
-    This is a blocking function.
+    Downloads and parses an article using the newspaper3k library, through the
+    shared scrape cache.
     """
-    article = Article(article_url)
-    try:
-        # The .download() method is a blocking operation.
-        article.download()
-        article.parse()
+    return _contents(await get_article(article_url, timeout))
 
-        text = article.text
-        title = article.title
-        filtered_lines = filter(str.strip, text.splitlines())
-        cleaned_text = "\n".join(filtered_lines)
-        return {"title": title, "text": cleaned_text}
 
-    except ArticleException as e:
-        logger.debug(f"Error on URL: {article_url} - {e}")
+def _contents(article: dict | None):
+    if article is None:
         return None
 
+    filtered_lines = filter(str.strip, article["text"].splitlines())
+    cleaned_text = "\n".join(filtered_lines)
+    return {"title": article["title"], "text": cleaned_text}
+
 
 async def extract_newspaper_contents(article_url: str):
     """
-    Asynchronously extracts article content by running the synchronous
-    scraping logic on a separate thread using asyncio.to_thread.
+    Asynchronously extracts article content by running the scrape on the
+    shared scrape executor (bounded per domain and overall, with a deadline
+    per URL). Returns None if the deadline passes, and the stale cached
+    copy (or None) if the download fails.
     """
-    return await asyncio.to_thread(_extract_newspaper_contents_sync, article_url)
+    try:
+        return await get_scrape_executor().run(_extract_newspaper_contents, article_url)
+    except asyncio.TimeoutError:
+        logger.warning(f"Scrape timed out: {article_url}")
+        return None
+    except ScrapeError as e:
+        # Counted against the domain by the executor; fall back to the stale copy if there is one
+        logger.warning(str(e))
+        return _contents(e.page)
@@ -0,0 +1,262 @@
+"""
+Shared NewsAPI gateway used by every route that queries NewsAPI.
+
+All calls go through one pooled (keep-alive) httpx.AsyncClient. Successful
+responses are cached in-process for NEWS_API_CACHE_TTL_SECONDS, keyed on the
+endpoint and query parameters (q, from, sortBy, page, ...). Concurrent identical
+requests share a single upstream call instead of each spending a request from
+the NewsAPI quota, and every upstream call is counted against NEWS_API_DAILY_QUOTA.
+
+A 429 response pauses every upstream call for its Retry-After delay (or an
+exponential backoff if there is none) before the request is retried.
+"""
+
+import asyncio
+import datetime
+import json
+import logging
+import math
+import time
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+
+import httpx
+
+from src.config.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Results per page (the NewsAPI maximum)
+PAGE_SIZE = 100
+
+
+def _retry_after_seconds(response: httpx.Response) -> float | None:
+    """
+    The Retry-After header in seconds, whether it is given as a delay or an HTTP date.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0.0)
+
+
+class NewsApiGateway:
+    """
+    Async NewsAPI client with a TTL response cache and single-flight request
+    coalescing. Error responses are never cached; they raise
+    httpx.HTTPStatusError for every caller waiting on that request.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://newsapi.org/v2",
+        ttl_seconds: float = 900,
+        timeout_seconds: float = 30,
+        daily_quota: int = 100,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        retry_initial_delay: float = 1.0,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.ttl_seconds = ttl_seconds
+        self.timeout_seconds = timeout_seconds
+        self.daily_quota = daily_quota
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_initial_delay = retry_initial_delay
+        self._client = None
+        self._client_loop = None
+        self._semaphore = None
+        self._paused_until = 0.0  # time.monotonic() before which no upstream call starts
+        self._entries = {}  # key -> (expires_at, response body)
+        self._in_flight = {}  # key -> asyncio.Task of the upstream call
+        self._quota_day = None
+        self.requests_today = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # A pooled client belongs to the event loop it was first used on
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(timeout=self.timeout_seconds)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._client_loop = loop
+        return self._client
+
+    def _count_request(self):
+        today = datetime.datetime.now(datetime.timezone.utc).date()
+        if today != self._quota_day:
+            self._quota_day = today
+            self.requests_today = 0
+        self.requests_today += 1
+
+    async def _fetch(self, key, endpoint: str, params: dict) -> bytes:
+        client = self._get_client()
+        for attempt in range(self.max_retries + 1):
+            pause = self._paused_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+            async with self._semaphore:
+                self._count_request()
+                # The key goes in a header rather than the URL, so it stays out of request logs
+                response = await client.get(
+                    f"{self.base_url}/{endpoint}", params=params, headers={"X-Api-Key": self.api_key}
+                )
+            if response.status_code != 429 or attempt == self.max_retries:
+                break
+
+            self.rate_limited += 1
+            delay = _retry_after_seconds(response)
+            if delay is None:
+                delay = self.retry_initial_delay * 2**attempt
+            if delay > self.timeout_seconds:
+                break  # e.g. the daily quota is used up, so don't hold the caller
+            logger.info(f"NewsAPI rate limited, pausing requests for {delay:.1f}s")
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+
+        if not response.is_success:
+            self.errors += 1
+            logger.warning(f"NewsAPI {endpoint} returned HTTP {response.status_code}")
+        response.raise_for_status()
+
+        now = time.monotonic()
+        self._entries = {k: entry for k, entry in self._entries.items() if entry[0] > now}
+        if self.ttl_seconds > 0:
+            self._entries[key] = (now + self.ttl_seconds, response.content)
+        return response.content
+
+    def _forget(self, key, task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # Retrieved here in case every waiter was cancelled
+
+    async def get(
+        self,
+        endpoint: str,
+        q: str,
+        from_date: str | None = None,
+        sort_by: str | None = None,
+        page: int = 1,
+        page_size: int = PAGE_SIZE,
+        to_date: str | None = None,
+    ) -> dict:
+        """
+        Calls a NewsAPI endpoint ("everything" or "top-headlines") and returns the
+        decoded JSON body, from the cache when possible.
+        """
+        params = {"q": q, "pageSize": page_size, "page": page}
+        if from_date:
+            params["from"] = from_date
+        if to_date:
+            params["to"] = to_date
+        if sort_by and endpoint == "everything":
+            params["sortBy"] = sort_by
+        key = (endpoint, *sorted(params.items()))
+
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return json.loads(entry[1])
+        self.misses += 1
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key, endpoint, params))
+            task.add_done_callback(lambda done: self._forget(key, done))
+            self._in_flight[key] = task
+        else:
+            self.coalesced += 1
+        # Shielded, so one caller disconnecting doesn't cancel the call for the others
+        return json.loads(await asyncio.shield(task))
+
+    async def get_pages(
+        self,
+        endpoint: str,
+        q: str,
+        from_date: str | None = None,
+        sort_by: str | None = None,
+        max_pages: int = 1,
+        to_date: str | None = None,
+    ):
+        """
+        Yields result pages as they arrive: the first page, then (at most
+        max_pages - 1) more pages of its totalResults, fetched concurrently.
+
+        An error on the first page is raised. Later pages that fail (e.g. past
+        the plan's result limit) are logged and skipped.
+        """
+        first_page = await self.get(endpoint, q, from_date, sort_by, page=1, to_date=to_date)
+
+        # Started before the first page is yielded, so they download while the caller works on it
+        num_pages = min(max_pages, math.ceil(first_page.get("totalResults", 0) / PAGE_SIZE))
+        tasks = [
+            asyncio.ensure_future(self.get(endpoint, q, from_date, sort_by, page=page, to_date=to_date))
+            for page in range(2, num_pages + 1)
+        ]
+        try:
+            yield first_page
+            for next_page in asyncio.as_completed(tasks):
+                try:
+                    yield await next_page
+                except httpx.HTTPError as e:
+                    logger.warning(f"Skipping NewsAPI page for {q!r}: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        if self._quota_day != datetime.datetime.now(datetime.timezone.utc).date():
+            self.requests_today = 0
+        lookups = self.hits + self.misses
+        return {
+            "requests_today": self.requests_today,
+            "daily_quota": self.daily_quota,
+            "quota_remaining": max(self.daily_quota - self.requests_today, 0),
+            "cache_size": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+@lru_cache(maxsize=1)
+def get_news_gateway():
+    """
+    Process-wide NewsAPI gateway, configured from Settings.
+    """
+    settings = get_settings()
+    return NewsApiGateway(
+        api_key=settings.NEWS_API_KEY,
+        base_url=settings.NEWS_API_BASE_URL,
+        ttl_seconds=settings.NEWS_API_CACHE_TTL_SECONDS,
+        timeout_seconds=settings.NEWS_API_TIMEOUT_SECONDS,
+        daily_quota=settings.NEWS_API_DAILY_QUOTA,
+        max_concurrency=settings.NEWS_API_MAX_CONCURRENCY,
+        max_retries=settings.NEWS_API_MAX_RETRIES,
+    )
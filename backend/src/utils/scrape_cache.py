@@ -0,0 +1,177 @@
+"""
+Postgres-backed cache of downloaded and parsed article pages (scrape_cache table).
+
+Every route that scrapes a URL goes through get_article, so opening an article and
+then running bias and summary on it downloads and parses it once. Entries younger
+than SCRAPE_CACHE_TTL_SECONDS are served as they are. Older ones are revalidated
+with a conditional GET, and a page whose HTML hash hasn't changed is not parsed again.
+The ingest worker deletes entries older than SCRAPE_CACHE_RETENTION_SECONDS (purge_expired).
+Downloading and parsing are done by the shared scrape pipeline (src/utils/scrape_pipeline.py).
+"""
+
+import datetime
+import hashlib
+import logging
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import httpx
+from newspaper import Config
+from newspaper.article import ArticleException
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+
+from src.config.config import get_settings
+from src.db import models
+from src.db.database import AsyncSessionLocal
+from src.utils.scrape_pipeline import get_scrape_pipeline, response_html
+
+logger = logging.getLogger(__name__)
+
+# Query parameters that only track where a click came from, not which page it is
+TRACKING_PARAM_PREFIXES = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+PAGE_FIELDS = ("title", "text", "authors", "publish_date", "html")
+
+
+class ScrapeError(Exception):
+    """
+    A download failed in a way that says the site is struggling or throttling us:
+    a network error, HTTP 429 or a server error. The scrape executor counts it
+    against the domain's concurrency limit. page is the stale cached copy, if any.
+    """
+
+    def __init__(self, url: str, status_code: int | None = None, page: dict | None = None):
+        super().__init__(f"Error on URL: {url} - " + (f"HTTP {status_code}" if status_code else "download failed"))
+        self.status_code = status_code
+        self.page = page
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL into a cache key: lower-case scheme and host, no default
+    port, fragment, trailing slash or tracking parameters, sorted query.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if netloc.endswith(DEFAULT_PORTS.get(scheme, "\0")):
+        netloc = netloc[: -len(DEFAULT_PORTS[scheme])]
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(
+        sorted(
+            (key, value)
+            for key, value in parse_qsl(parts.query, keep_blank_values=True)
+            if not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+        )
+    )
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+async def _fetch(url: str, etag: str | None, last_modified: str | None, timeout: float | None):
+    config = Config()
+    headers = {"User-Agent": config.browser_user_agent}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    timeout = min(config.request_timeout, timeout) if timeout else config.request_timeout
+    return await get_scrape_pipeline().fetch(url, headers, timeout)
+
+
+async def _store(key: str, page: dict, etag, last_modified, content_hash, fetched_at):
+    values = {
+        "url": key,
+        **page,
+        "etag": etag,
+        "last_modified": last_modified,
+        "content_hash": content_hash,
+        "fetched_at": fetched_at,
+    }
+    statement = insert(models.ScrapedPage).values(values)
+    statement = statement.on_conflict_do_update(
+        index_elements=[models.ScrapedPage.url],
+        set_={k: statement.excluded[k] for k in values if k != "url"},
+    )
+    async with AsyncSessionLocal() as db:
+        await db.execute(statement)
+        await db.commit()
+
+
+async def get_article(url: str, timeout: float | None = None) -> dict | None:
+    """
+    Returns the title, text, authors, publish_date and html of an article page,
+    from the scrape cache when possible.
+
+    Args:
+        url (str): The article URL.
+        timeout (float | None): Caps the download's timeout, in seconds.
+
+    Returns:
+        dict | None: The page fields, or None if it couldn't be downloaded or parsed.
+
+    Raises:
+        ScrapeError: On a network error, HTTP 429 or a server error, with the
+        stale cached copy (if any) as its page.
+    """
+    key = normalize_url(url)
+    now = datetime.datetime.now(datetime.timezone.utc)
+
+    # Only hold a DB connection for the lookup and the write, never across the download
+    async with AsyncSessionLocal() as db:
+        cached = await db.get(models.ScrapedPage, key)
+        if cached is not None:
+            cached_page = {field: getattr(cached, field) for field in PAGE_FIELDS}
+            cached_hash, etag, last_modified = cached.content_hash, cached.etag, cached.last_modified
+            age = (now - cached.fetched_at).total_seconds()
+        else:
+            cached_page, cached_hash, etag, last_modified = None, None, None, None
+
+    if cached_page is not None and age < get_settings().SCRAPE_CACHE_TTL_SECONDS:
+        return cached_page
+
+    try:
+        response = await _fetch(url, etag, last_modified, timeout)
+    except httpx.InvalidURL as e:
+        logger.debug(f"Error on URL: {url} - {e}")
+        return None
+    except httpx.HTTPError as e:
+        logger.debug(f"Error on URL: {url} - {e}")
+        raise ScrapeError(url, page=cached_page) from e
+
+    if cached_page is not None and response.status_code == 304:
+        logger.debug(f"Scrape cache revalidated (304): {url}")
+        page, content_hash = cached_page, cached_hash
+    elif not response.is_success:
+        logger.debug(f"Error on URL: {url} - HTTP {response.status_code}")
+        if response.status_code == 429 or response.status_code >= 500:
+            raise ScrapeError(url, response.status_code, cached_page)
+        return None
+    else:
+        html = response_html(response)
+        content_hash = hashlib.sha256(html.encode()).hexdigest()
+        if content_hash == cached_hash:
+            logger.debug(f"Scrape cache content unchanged: {url}")
+            page = cached_page
+        else:
+            try:
+                page = {**await get_scrape_pipeline().parse(url, html), "html": html}
+            except ArticleException as e:
+                logger.debug(f"Error on URL: {url} - {e}")
+                return None
+
+    etag = response.headers.get("ETag", etag)
+    last_modified = response.headers.get("Last-Modified", last_modified)
+    await _store(key, page, etag, last_modified, content_hash, now)
+    return page
+
+
+async def purge_expired(retention_seconds: float) -> int:
+    """
+    Deletes the pages last fetched more than retention_seconds ago and returns
+    how many were removed.
+    """
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(seconds=retention_seconds)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(delete(models.ScrapedPage).where(models.ScrapedPage.fetched_at < cutoff))
+        await db.commit()
+    return result.rowcount
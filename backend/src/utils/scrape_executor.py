@@ -0,0 +1,187 @@
+"""
+Bounded executor for the article scrapes (download + parse).
+
+Scrapes are coroutines run on the caller's event loop, with:
+- a global cap on scrapes in flight (SCRAPE_MAX_WORKERS),
+- a per-domain concurrency limit, adapted AIMD-style: +1/limit after each fast,
+  successful scrape, halved after an error (the scrape raised, e.g. a
+  ScrapeError on HTTP 429 or a server error) or a scrape slower than
+  SCRAPE_TARGET_LATENCY_SECONDS (between 1 and SCRAPE_DOMAIN_MAX_CONCURRENCY),
+- a hard per-URL deadline (SCRAPE_TIMEOUT_SECONDS) that covers waiting for a slot.
+
+A scrape still running at its deadline is cancelled, which frees its slots and
+counts as an error for its domain. Scrapes still waiting for a slot when their
+caller gives up are never started.
+"""
+
+import asyncio
+import time
+from collections import deque
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from src.config.config import get_settings
+
+
+class _DomainLimit:
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters = deque()
+        self.ewma_latency = None
+        self.successes = 0
+        self.errors = 0
+        self.timeouts = 0
+
+
+class ScrapeExecutor:
+    def __init__(
+        self,
+        max_workers: int = 16,
+        domain_initial_concurrency: int = 2,
+        domain_max_concurrency: int = 8,
+        timeout_seconds: float = 20,
+        target_latency_seconds: float = 5,
+    ):
+        self.max_workers = max_workers
+        self.domain_initial_concurrency = domain_initial_concurrency
+        self.domain_max_concurrency = domain_max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.target_latency_seconds = target_latency_seconds
+        self._domains = {}
+        self._loop = None
+        self._slots = None
+
+    def _bind_loop(self):
+        # The semaphore and waiters belong to the event loop they were created on
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_workers)
+            for domain in self._domains.values():
+                domain.in_flight = 0
+                domain.waiters.clear()
+        return loop
+
+    async def _acquire_domain(self, domain: _DomainLimit):
+        while domain.in_flight >= int(domain.limit):
+            waiter = self._loop.create_future()
+            domain.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter.done() and not waiter.cancelled():
+                    # Woken just as our caller gave up: pass the free slot on to the next waiter
+                    self._wake(domain)
+                raise
+            finally:
+                if waiter in domain.waiters:
+                    domain.waiters.remove(waiter)
+        domain.in_flight += 1
+
+    def _wake(self, domain: _DomainLimit):
+        free = int(domain.limit) - domain.in_flight
+        while free > 0 and domain.waiters:
+            waiter = domain.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    async def _acquire(self, domain: _DomainLimit):
+        # The domain slot first, so scrapes queued behind a slow or throttled
+        # domain don't hold global slots that other domains could use
+        await self._acquire_domain(domain)
+        try:
+            await self._slots.acquire()
+        except BaseException:
+            domain.in_flight -= 1
+            self._wake(domain)
+            raise
+
+    def _finished(self, domain: _DomainLimit, started: float, failed: bool):
+        """
+        Runs once the scrape is done, failed or cancelled: frees its slots and
+        adapts the domain's limit.
+        """
+        latency = time.monotonic() - started
+        domain.ewma_latency = (
+            latency if domain.ewma_latency is None else 0.8 * domain.ewma_latency + 0.2 * latency
+        )
+        if failed:
+            domain.errors += 1
+        else:
+            domain.successes += 1
+        if failed or latency > self.target_latency_seconds:
+            domain.limit = max(1.0, domain.limit / 2)
+        else:
+            domain.limit = min(float(self.domain_max_concurrency), domain.limit + 1 / domain.limit)
+
+        domain.in_flight -= 1
+        self._slots.release()
+        self._wake(domain)
+
+    async def run(self, fn, url: str):
+        """
+        Awaits the coroutine function fn(url, timeout) within the global and per-domain
+        limits, where timeout is the number of seconds left before the deadline.
+
+        Raises asyncio.TimeoutError if no result arrives within timeout_seconds.
+        """
+        self._bind_loop()
+        deadline = time.monotonic() + self.timeout_seconds
+        hostname = (urlsplit(url).hostname or "").lower()
+        domain = self._domains.get(hostname)
+        if domain is None:
+            domain = self._domains[hostname] = _DomainLimit(float(self.domain_initial_concurrency))
+
+        try:
+            await asyncio.wait_for(self._acquire(domain), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            domain.timeouts += 1
+            raise
+
+        started = time.monotonic()
+        remaining = max(deadline - started, 0.1)
+        failed = True
+        try:
+            result = await asyncio.wait_for(fn(url, remaining), timeout=remaining)
+            failed = False
+            return result
+        except asyncio.TimeoutError:
+            domain.timeouts += 1
+            raise
+        finally:
+            self._finished(domain, started, failed)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": sum(domain.in_flight for domain in self._domains.values()),
+            "domains": {
+                hostname: {
+                    "limit": round(domain.limit, 2),
+                    "in_flight": domain.in_flight,
+                    "waiting": len(domain.waiters),
+                    "ewma_latency_seconds": domain.ewma_latency,
+                    "successes": domain.successes,
+                    "errors": domain.errors,
+                    "timeouts": domain.timeouts,
+                }
+                for hostname, domain in self._domains.items()
+            },
+        }
+
+
+@lru_cache(maxsize=1)
+def get_scrape_executor():
+    """
+    Process-wide scrape executor, configured from Settings.
+    """
+    settings = get_settings()
+    return ScrapeExecutor(
+        max_workers=settings.SCRAPE_MAX_WORKERS,
+        domain_initial_concurrency=settings.SCRAPE_DOMAIN_INITIAL_CONCURRENCY,
+        domain_max_concurrency=settings.SCRAPE_DOMAIN_MAX_CONCURRENCY,
+        timeout_seconds=settings.SCRAPE_TIMEOUT_SECONDS,
+        target_latency_seconds=settings.SCRAPE_TARGET_LATENCY_SECONDS,
+    )
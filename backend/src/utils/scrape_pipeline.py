@@ -0,0 +1,128 @@
+"""
+Download and parse stages behind the scrape cache.
+
+Downloads are awaited on the caller's event loop, through a pooled
+httpx.AsyncClient (keep-alive, HTTP/2, gzip and brotli) kept per event loop, so
+a scrape waiting on the network holds no thread.
+
+The CPU-heavy newspaper / lxml parse runs in a pool of SCRAPE_PARSE_PROCESSES
+processes, so parsing one page doesn't hold the GIL while others download.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+
+import httpx
+from newspaper import Article
+from newspaper.parsers import Parser
+
+from src.config.config import get_settings
+
+
+def parse_html(url: str, html: str) -> dict:
+    """
+    Parses a downloaded article page. Runs in the parse processes, so it only
+    takes and returns picklable values (the html isn't sent back).
+    """
+    article = Article(url)
+    article.set_html(html)
+    article.parse()
+    return {
+        "title": article.title,
+        "text": article.text,
+        "authors": list(article.authors),
+        "publish_date": article.publish_date,
+    }
+
+
+def response_html(response: httpx.Response) -> str:
+    """
+    The page's HTML as text: decoded with the charset from the Content-Type
+    header if there is one, otherwise sniffed from the bytes the way newspaper does.
+    """
+    if response.charset_encoding:
+        html = response.text
+    else:
+        html = Parser.get_unicode_html(response.content)
+    return html.replace("\x00", "")
+
+
+class ScrapePipeline:
+    def __init__(self, parse_processes: int = 2, max_connections: int = 16):
+        self.parse_processes = parse_processes
+        self.max_connections = max_connections
+        self._lock = threading.Lock()
+        self._client = None
+        self._client_loop = None
+        self._pool = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # The client's connections belong to the event loop it was created on
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            limits = httpx.Limits(
+                max_connections=self.max_connections, max_keepalive_connections=self.max_connections
+            )
+            self._client = httpx.AsyncClient(http2=True, follow_redirects=True, limits=limits)
+            self._client_loop = loop
+        return self._client
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawned, not forked: forking a process that already runs torch and other threads can deadlock
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.parse_processes, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    async def fetch(self, url: str, headers: dict, timeout: float) -> httpx.Response:
+        """
+        Downloads a page on the shared client.
+        """
+        try:
+            # timeout bounds each connect / read, wait_for the whole download
+            return await asyncio.wait_for(self._get_client().get(url, headers=headers, timeout=timeout), timeout)
+        except asyncio.TimeoutError:
+            raise httpx.ReadTimeout(f"Download took longer than {timeout}s") from None
+
+    async def parse(self, url: str, html: str) -> dict:
+        """
+        Parses a page in the parse processes (or on a worker thread if there are none).
+        """
+        if self.parse_processes <= 0:
+            return await asyncio.to_thread(parse_html, url, html)
+        pool = self._get_pool()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, parse_html, url, html)
+        except BrokenProcessPool:
+            # A parse process died (e.g. killed for memory): start a new pool for the next pages
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            return await asyncio.to_thread(parse_html, url, html)
+
+    async def aclose(self):
+        client, self._client = self._client, None
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if client is not None:
+            await client.aclose()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+@lru_cache(maxsize=1)
+def get_scrape_pipeline():
+    """
+    Process-wide scrape pipeline, configured from Settings.
+    """
+    settings = get_settings()
+    return ScrapePipeline(
+        parse_processes=settings.SCRAPE_PARSE_PROCESSES,
+        max_connections=settings.SCRAPE_MAX_WORKERS,
+    )
@@ -0,0 +1,39 @@
+"""
+Helpers for streaming responses as server-sent events (text/event-stream).
+"""
+
+import json
+import logging
+
+from fastapi.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(event: str, data) -> str:
+    """
+    Formats one server-sent event with a JSON payload.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def sse_response(events) -> StreamingResponse:
+    """
+    Streams an async iterator of formatted events. Once the stream has started the
+    status code can't change anymore, so a failure is sent as an "error" event.
+    """
+
+    async def guarded_events():
+        try:
+            async for event in events:
+                yield event
+        except Exception as e:
+            logger.exception("Error while streaming events")
+            yield sse_event("error", {"detail": f"An unexpected error occurred: {e}"})
+
+    return StreamingResponse(
+        guarded_events(),
+        media_type="text/event-stream",
+        # Stop proxies (e.g. nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,164 @@
+"""
+pgvector ANN index management for chunked_data.embedding.
+
+Without an index every ORDER BY embedding <=> / <-> query ... LIMIT k is a full
+sequential scan. HNSW and IVFFlat indexes can be built for both the cosine and
+l2 operator classes, and the per-query search breadth (hnsw.ef_search /
+ivfflat.probes) can be tuned per transaction.
+"""
+
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_METHODS = ("hnsw", "ivfflat")
+VECTOR_INDEX_OPCLASSES = {"cosine": "vector_cosine_ops", "l2": "vector_l2_ops"}
+
+
+def vector_index_name(method: str, metric: str) -> str:
+    return f"chunked_data_embedding_{method}_{metric}_idx"
+
+
+def build_vector_index_sql(method: str, metric: str, settings, concurrently=False):
+    """
+    Builds the CREATE INDEX statement for a method/metric pair, using the build
+    parameters from Settings.
+    """
+    if method not in VECTOR_INDEX_METHODS:
+        raise ValueError(f"Unknown vector index method: {method}")
+    if metric not in VECTOR_INDEX_OPCLASSES:
+        raise ValueError(f"Unknown vector index metric: {metric}")
+
+    if method == "hnsw":
+        params = f"m = {int(settings.HNSW_M)}, ef_construction = {int(settings.HNSW_EF_CONSTRUCTION)}"
+    else:
+        params = f"lists = {int(settings.IVFFLAT_LISTS)}"
+
+    return (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS "
+        f"{vector_index_name(method, metric)} ON chunked_data "
+        f"USING {method} (embedding {VECTOR_INDEX_OPCLASSES[metric]}) WITH ({params})"
+    )
+
+
+def create_vector_index(engine, method: str, metric: str, settings, concurrently=True):
+    """
+    Creates an ANN index on chunked_data.embedding. CONCURRENTLY cannot run inside a
+    transaction block, so this uses its own autocommit connection.
+    """
+    statement = build_vector_index_sql(method, metric, settings, concurrently)
+    logger.info(f"Building vector index: {statement}")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(statement))
+
+
+def drop_vector_index(engine, method: str, metric: str):
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(
+            text(f"DROP INDEX CONCURRENTLY IF EXISTS {vector_index_name(method, metric)}")
+        )
+
+
+def configured_metrics(settings) -> list[str]:
+    return [m.strip() for m in settings.VECTOR_INDEX_METRICS.split(",") if m.strip()]
+
+
+def ensure_vector_indexes(engine, settings):
+    """
+    Creates the indexes configured in Settings if they don't exist yet, with
+    CONCURRENTLY so reads and ingest writes carry on during the build (run by
+    `python -m src.build_indexes`). A build that failed part way leaves an invalid
+    index behind, which IF NOT EXISTS would skip, so those are dropped and rebuilt.
+    IVFFlat picks its list centroids from the rows present at build time, so it is
+    skipped on an empty table and should be built later.
+    """
+    method = settings.VECTOR_INDEX_METHOD
+    if method == "none":
+        return
+
+    if method == "ivfflat":
+        with engine.connect() as conn:
+            has_rows = conn.execute(text("SELECT EXISTS (SELECT 1 FROM chunked_data)")).scalar()
+        if not has_rows:
+            logger.info("Skipping IVFFlat index build, chunked_data is empty")
+            return
+
+    with engine.connect() as conn:
+        invalid = set(
+            conn.execute(
+                text(
+                    "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                    "WHERE i.indrelid = 'chunked_data'::regclass AND NOT i.indisvalid"
+                )
+            ).scalars()
+        )
+    for metric in configured_metrics(settings):
+        if vector_index_name(method, metric) in invalid:
+            logger.info(f"Dropping invalid vector index {vector_index_name(method, metric)}")
+            drop_vector_index(engine, method, metric)
+        create_vector_index(engine, method, metric, settings)
+
+
+def vector_index_status(db) -> list[dict]:
+    """
+    Reports every index on chunked_data.embedding with its size and build state.
+    Indexes still being built with CONCURRENTLY show up as not valid, with the
+    progress reported by pg_stat_progress_create_index.
+    """
+    rows = db.execute(
+        text(
+            """
+            SELECT c.relname AS name,
+                   am.amname AS method,
+                   pg_get_indexdef(i.indexrelid) AS definition,
+                   pg_relation_size(i.indexrelid) AS size_bytes,
+                   pg_size_pretty(pg_relation_size(i.indexrelid)) AS size,
+                   i.indisvalid AS is_valid,
+                   i.indisready AS is_ready,
+                   p.phase AS build_phase,
+                   p.blocks_done, p.blocks_total,
+                   p.tuples_done, p.tuples_total
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = c.relam
+            LEFT JOIN pg_stat_progress_create_index p ON p.index_relid = i.indexrelid
+            WHERE i.indrelid = 'chunked_data'::regclass
+              AND am.amname IN ('hnsw', 'ivfflat')
+            ORDER BY c.relname
+            """
+        )
+    ).mappings()
+    return [dict(row) for row in rows]
+
+
+def _vector_search_param_statements(ef_search: int | None, probes: int | None):
+    for name, value in (("ef_search", ef_search), ("probes", probes)):
+        if value is not None and value < 1:
+            raise ValueError(f"{name} must be at least 1, got {value}")
+    # set_config(..., is_local=true) is the parameterisable form of SET LOCAL
+    statement = text("SELECT set_config(:name, :value, true)")
+    if ef_search is not None:
+        yield statement, {"name": "hnsw.ef_search", "value": str(ef_search)}
+    if probes is not None:
+        yield statement, {"name": "ivfflat.probes", "value": str(probes)}
+
+
+def set_vector_search_params(db, ef_search: int | None = None, probes: int | None = None):
+    """
+    Sets hnsw.ef_search / ivfflat.probes for the current transaction only.
+    Higher values trade latency for recall.
+    """
+    for statement, params in _vector_search_param_statements(ef_search, probes):
+        db.execute(statement, params)
+
+
+async def set_vector_search_params_async(
+    db, ef_search: int | None = None, probes: int | None = None
+):
+    """
+    AsyncSession version of set_vector_search_params.
+    """
+    for statement, params in _vector_search_param_statements(ef_search, probes):
+        await db.execute(statement, params)
@@ -0,0 +1,162 @@
+"""
+Incremental ingestion of watchlist topics (watch_topics table).
+
+The ingest workers run schedule_due_topics on every pass of their loop. Each due
+topic gets an ingest job that only asks NewsAPI for articles published since the
+topic's high-water mark (sorted by publishedAt). When the job succeeds,
+record_topic_poll moves the mark forward and adapts the topic's polling interval
+to how many new articles the poll found.
+
+A job fetches at most NEWS_API_MAX_PAGES pages of the newest results. When there
+were more, the mark stays put and the next polls backfill the older articles
+(see advance_high_water_mark).
+"""
+
+import datetime
+import logging
+
+from sqlalchemy import func, select, text
+
+from src.db import models
+from src.utils.ingest import enqueue_ingest_job
+from src.utils.news_gateway import PAGE_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def next_poll_interval(
+    interval: float,
+    new_articles: int,
+    target_new_articles: int,
+    min_seconds: float,
+    max_seconds: float,
+) -> float:
+    """
+    Scales the interval so a poll finds about target_new_articles: shorter when a
+    poll finds more, longer when it finds fewer (at most halved or doubled per poll).
+    """
+    factor = target_new_articles / new_articles if new_articles else 2.0
+    factor = min(max(factor, 0.5), 2.0)
+    return min(max(interval * factor, min_seconds), max_seconds)
+
+
+def advance_high_water_mark(
+    last_published_at: datetime.datetime | None,
+    backfill_until: datetime.datetime | None,
+    backfill_newest: datetime.datetime | None,
+    published: list[datetime.datetime],
+    truncated: bool,
+) -> tuple:
+    """
+    Moves a topic's (last_published_at, backfill_until, backfill_newest) on after a
+    poll that fetched articles published at `published`.
+
+    A truncated poll (NewsAPI had more results than it fetched) only got the
+    newest articles, so the mark stays put and backfill_until drops to the oldest
+    one fetched: the next poll asks for the articles between the mark and there.
+    Once a poll gets everything, the mark moves to the newest article seen since
+    the backfill started.
+    """
+    if truncated and published and (backfill_until is None or min(published) < backfill_until):
+        newest = max(published + ([backfill_newest] if backfill_newest else []))
+        return last_published_at, min(published), newest
+    # Complete, or a truncated poll that got no further back (more articles share a
+    # timestamp than a poll can fetch): move the mark past everything fetched
+    seen = published + [t for t in (last_published_at, backfill_newest) if t is not None]
+    return (max(seen) if seen else None), None, None
+
+
+def upgrade_watch_topics_table(bind):
+    """
+    Fills query_key in for topics added before it existed (run at startup, after
+    add_missing_columns). Those topics stored the normalized query, so it is their key.
+    """
+    with bind.begin() as conn:
+        conn.execute(text("UPDATE watch_topics SET query_key = query WHERE query_key IS NULL"))
+    for index in models.WatchTopic.__table__.indexes:
+        index.create(bind=bind, checkfirst=True)
+
+
+async def schedule_due_topics(db) -> int:
+    """
+    Queues an incremental ingest job for every enabled topic whose next poll is
+    due. Topics locked by another worker's scheduler are skipped.
+
+    Returns:
+        int: The number of topics polled.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    topics = (
+        await db.scalars(
+            select(models.WatchTopic)
+            .where(models.WatchTopic.enabled, models.WatchTopic.next_poll_at <= now)
+            .with_for_update(skip_locked=True)
+        )
+    ).all()
+    # Pushed back before queueing, so the next pass doesn't poll them again
+    for topic in topics:
+        topic.next_poll_at = now + datetime.timedelta(seconds=topic.poll_interval_seconds)
+    await db.commit()
+
+    for topic in topics:
+        job, created = await enqueue_ingest_job(
+            db,
+            topic.query,
+            from_date=topic.last_published_at,
+            to_date=topic.backfill_until,
+            sort_by="publishedAt",
+            topic_id=topic.topic_id,
+        )
+        if created:
+            logger.info(f"Polling watchlist topic {topic.query!r} (job {job.job_id})")
+        else:
+            logger.info(f"Watchlist topic {topic.query!r} is still being polled (job {job.job_id})")
+    return len(topics)
+
+
+async def record_topic_poll(db, job_id, settings):
+    """
+    After a watchlist job succeeds: advances its topic's publishedAt high-water
+    mark (or its backfill, if the job was truncated) and adapts its polling
+    interval. Does nothing for other jobs.
+    """
+    job = await db.get(models.IngestJob, job_id)
+    if job is None or job.topic_id is None:
+        return
+    topic = await db.get(models.WatchTopic, job.topic_id, with_for_update=True)
+    if topic is None:
+        return
+
+    article = models.IngestJobArticle
+    published = [
+        datetime.datetime.fromisoformat(published_at.replace("Z", "+00:00"))
+        for published_at in await db.scalars(
+            select(article.article["publishedAt"].astext).where(article.job_id == job_id)
+        )
+        if published_at
+    ]
+    new_articles = await db.scalar(
+        select(func.count()).where(article.job_id == job_id, article.state == "stored")
+    )
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    # Pages past NEWS_API_MAX_PAGES (or the plan's result limit) were not fetched
+    truncated = (job.total_results or 0) > job.pages_fetched * PAGE_SIZE
+    topic.last_published_at, topic.backfill_until, topic.backfill_newest = advance_high_water_mark(
+        topic.last_published_at, topic.backfill_until, topic.backfill_newest, published, truncated
+    )
+    topic.poll_interval_seconds = next_poll_interval(
+        topic.poll_interval_seconds,
+        new_articles,
+        settings.WATCHLIST_TARGET_NEW_ARTICLES,
+        settings.WATCHLIST_MIN_INTERVAL_SECONDS,
+        settings.WATCHLIST_MAX_INTERVAL_SECONDS,
+    )
+    topic.last_polled_at = now
+    topic.last_new_articles = new_articles
+    topic.next_poll_at = now + datetime.timedelta(seconds=topic.poll_interval_seconds)
+    await db.commit()
+    logger.info(
+        f"Watchlist topic {topic.query!r}: {new_articles} new articles, "
+        f"next poll in {topic.poll_interval_seconds:.0f}s"
+    )
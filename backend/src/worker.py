@@ -0,0 +1,91 @@
+"""
+Ingest worker: claims jobs from the ingest_jobs queue and runs them (see
+src/utils/ingest.py), and queues the polls of due watchlist topics (see
+src/utils/watchlist.py). It also deletes expired Gemini cache entries and old
+scraped pages (see src/utils/gemini_cache.py and src/utils/scrape_cache.py). Start as many as needed, on any number of hosts:
+    python -m src.worker
+
+SIGTERM / SIGINT hand the current job back to the queue after its current batch.
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+
+from src.config.config import get_settings
+from src.db import models
+from src.db.database import AsyncSessionLocal, add_missing_columns, engine
+from src.utils import scrape_cache
+from src.utils.gemini_cache import get_gemini_response_cache
+from src.utils.ingest import claim_job, run_job, upgrade_ingest_jobs_table
+from src.utils.local_models import get_embeddings_model
+from src.utils.scrape_pipeline import get_scrape_pipeline
+from src.utils.watchlist import record_topic_poll, schedule_due_topics, upgrade_watch_topics_table
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+async def main():
+    settings = get_settings()
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+
+    embedding_model = await asyncio.to_thread(get_embeddings_model)
+    logger.info(f"Ingest worker {worker_id} started")
+
+    gemini_cache = get_gemini_response_cache()
+    next_purge = time.monotonic()
+    while not stopping.is_set():
+        if time.monotonic() >= next_purge:
+            # Expired answers are only skipped on read, so delete them here (at most hourly)
+            purged = await gemini_cache.purge_expired()
+            if purged:
+                logger.info(f"Purged {purged} expired Gemini cache entries")
+            # The scrape cache only revalidates stale pages, so without this it grows forever
+            try:
+                purged = await scrape_cache.purge_expired(settings.SCRAPE_CACHE_RETENTION_SECONDS)
+            except Exception as e:
+                logger.warning(f"Scrape cache purge failed: {e}")
+            else:
+                if purged:
+                    logger.info(f"Purged {purged} old scrape cache entries")
+            next_purge = time.monotonic() + 3600
+
+        async with AsyncSessionLocal() as db:
+            await schedule_due_topics(db)
+            job_id = await claim_job(db, worker_id, settings.INGEST_JOB_LEASE_SECONDS)
+        if job_id is None:
+            try:
+                await asyncio.wait_for(stopping.wait(), timeout=settings.INGEST_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        logger.info(f"Claimed ingest job {job_id}")
+        if await run_job(job_id, embedding_model, worker_id, stopping) == "succeeded":
+            async with AsyncSessionLocal() as db:
+                await record_topic_poll(db, job_id, settings)
+
+    await get_scrape_pipeline().aclose()
+    logger.info(f"Ingest worker {worker_id} stopped")
+
+
+if __name__ == "__main__":
+    # The API creates the tables too; create_all only adds the ones that are missing
+    models.Base.metadata.create_all(bind=engine)
+    add_missing_columns(engine, models.IngestJob.__table__)
+    add_missing_columns(engine, models.Chunk.__table__)
+    add_missing_columns(engine, models.WatchTopic.__table__)
+    upgrade_ingest_jobs_table(engine)
+    upgrade_watch_topics_table(engine)
+    asyncio.run(main())
@@ -2,6 +2,7 @@
 
 import { useState } from 'react';
 import ArticleSummaryResult from '@/components/summaryPage';
+import { readEventStream } from '@/lib/readEventStream';
 
 export default function SummaryPage() {
   const [link, setLink] = useState('');
@@ -19,10 +20,11 @@ export default function SummaryPage() {
     setError(null);
     setResult(null);
 
+    // The AI summary is streamed, so the article shows up before Gemini has finished
     const endpoint =
       mode === 'nlp'
         ? 'http://localhost:8000/api/v1/summarize/analyze'
-        : 'http://localhost:8000/api/v1/summarize/generate';
+        : 'http://localhost:8000/api/v1/summarize/generate-stream';
 
     try {
       const res = await fetch(endpoint, {
@@ -41,8 +43,24 @@ export default function SummaryPage() {
         throw new Error(`Backend error: ${res.status} ${errorText}`);
       }
 
-      const json = await res.json();
-      setResult(json);
+      if (mode === 'nlp') {
+        const json = await res.json();
+        setResult(json);
+      } else {
+        let streamed = '';
+        await readEventStream(res, (event, data) => {
+          if (event === 'metadata') {
+            setResult({ summary: [], extra: data });
+          } else if (event === 'token') {
+            streamed += data.text;
+            setResult((prev: any) => ({ ...prev, summary: [streamed] }));
+          } else if (event === 'done') {
+            setResult((prev: any) => ({ ...prev, summary: data.summary }));
+          } else if (event === 'error') {
+            throw new Error(`Backend error: ${data.detail}`);
+          }
+        });
+      }
     } catch (err: any) {
       if (err.name === 'TypeError' && err.message.includes('Failed to fetch')) {
         setError('Unable to connect to backend. Is the server running?');